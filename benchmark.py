@@ -0,0 +1,721 @@
+import argparse
+import chess
+import contextlib
+import chess.pgn
+import json
+import os
+import subprocess
+import sys
+import time
+import torch
+import computer_player
+from zobrist import ZobristTracker, zobrist_hash
+from nnue import AccumulatorEvaluator, Accumulator
+from position import Position, perft
+
+# -------------------------------
+# Benchmark Positions
+# -------------------------------
+def load_positions(pgn_path="sample_1000.pgn", max_games=20, every=4):
+    """Sample positions from the mainlines of the first games in a PGN file"""
+    positions = []
+    with open(pgn_path) as f:
+        for _ in range(max_games):
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves()):
+                board.push(move)
+                if ply % every == 0 and not board.is_game_over():
+                    positions.append(board.copy(stack=False))
+    return positions
+
+# -------------------------------
+# Board Encoding
+# -------------------------------
+def board_to_tensor_reference(board):
+    """The original per-square board_to_tensor, kept as the correctness baseline"""
+    tensor = torch.zeros((12, 8, 8), dtype=torch.float32)
+    piece_to_channel = {
+        chess.PAWN: 0, chess.KNIGHT: 1, chess.BISHOP: 2,
+        chess.ROOK: 3, chess.QUEEN: 4, chess.KING: 5
+    }
+
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece:
+            channel = piece_to_channel[piece.piece_type]
+            if piece.color == chess.BLACK:
+                channel += 6
+            row, col = 7 - square // 8, square % 8
+            tensor[channel, row, col] = 1
+
+    extra = torch.tensor([
+        board.has_kingside_castling_rights(chess.WHITE),
+        board.has_queenside_castling_rights(chess.WHITE),
+        board.has_kingside_castling_rights(chess.BLACK),
+        board.has_queenside_castling_rights(chess.BLACK),
+        board.turn == chess.WHITE
+    ], dtype=torch.float32)
+
+    return tensor.unsqueeze(0), extra.unsqueeze(0)
+
+def bench_board_to_tensor(positions, repeats=5):
+    """Check the bitboard encoder against the reference and time both"""
+    for board in positions:
+        expected_board, expected_extra = board_to_tensor_reference(board)
+        board_tensor, extra = computer_player.board_to_tensor(board)
+        if not (torch.equal(board_tensor, expected_board) and torch.equal(extra, expected_extra)):
+            raise AssertionError(f"board_to_tensor mismatch for {board.fen()}")
+
+    timings = {}
+    for name, encode in (("reference", board_to_tensor_reference),
+                         ("bitboard", computer_player.board_to_tensor)):
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            for board in positions:
+                encode(board)
+        timings[name] = len(positions) * repeats / (time.perf_counter() - start_time)
+
+    print(f"\nboard_to_tensor ({len(positions)} positions, identical output)")
+    print(f"  Reference: {timings['reference']:.0f} pos/s")
+    print(f"  Bitboard:  {timings['bitboard']:.0f} pos/s")
+    print(f"  Speedup:   {timings['bitboard'] / timings['reference']:.1f}x")
+    return timings
+
+# -------------------------------
+# Attack Bonus
+# -------------------------------
+def attack_bonus_reference(board):
+    """The previous attack_bonus: square loops and gives_check on every legal move"""
+    bonus = 0
+    queens = len(board.pieces(chess.QUEEN, chess.WHITE)) + len(board.pieces(chess.QUEEN, chess.BLACK))
+    minors = len(board.pieces(chess.KNIGHT, chess.WHITE)) + len(board.pieces(chess.KNIGHT, chess.BLACK)) + \
+             len(board.pieces(chess.BISHOP, chess.WHITE)) + len(board.pieces(chess.BISHOP, chess.BLACK))
+    if queens == 0 or (queens == 2 and minors <= 4) or board.fullmove_number < 10:
+        return bonus
+
+    for color in [chess.WHITE, chess.BLACK]:
+        enemy_side = 4 if color == chess.WHITE else 3
+        for piece_type in [chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN]:
+            for square in board.pieces(piece_type, color):
+                rank = chess.square_rank(square)
+                if (color == chess.WHITE and rank >= enemy_side) or \
+                   (color == chess.BLACK and rank <= enemy_side):
+                    bonus += 15 if color == chess.WHITE else -15
+    for move in board.legal_moves:
+        if board.gives_check(move):
+            bonus += 10 if board.turn == chess.WHITE else -10
+    return bonus
+
+def bench_attack_bonus(positions, repeats=5):
+    """attack_bonus against the reference, uncached and with every position cached"""
+    # Include each position's children, as quiesce sees them
+    boards = []
+    for position in positions:
+        boards.append(position)
+        for move in list(position.legal_moves)[:10]:
+            child = position.copy(stack=False)
+            child.push(move)
+            boards.append(child)
+
+    for board in boards:
+        computer_player.attack_cache.clear()
+        if computer_player.attack_bonus(board) != attack_bonus_reference(board):
+            raise AssertionError(f"attack_bonus differs on {board.fen()}")
+
+    timings = {}
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        for board in boards:
+            attack_bonus_reference(board)
+    timings["reference"] = len(boards) * repeats / (time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        computer_player.attack_cache.clear()
+        for board in boards:
+            computer_player.attack_bonus(board)
+    timings["bitboard"] = len(boards) * repeats / (time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        for board in boards:
+            computer_player.attack_bonus(board)
+    timings["cached"] = len(boards) * repeats / (time.perf_counter() - start_time)
+
+    middlegame = sum(computer_player.game_phase(board) == "middlegame" for board in boards)
+    print(f"\nattack_bonus ({len(boards)} positions, {middlegame} middlegame, identical output)")
+    print(f"  Reference: {timings['reference']:.0f} pos/s")
+    print(f"  Bitboard:  {timings['bitboard']:.0f} pos/s ({timings['bitboard'] / timings['reference']:.1f}x)")
+    print(f"  Cached:    {timings['cached']:.0f} pos/s ({timings['cached'] / timings['reference']:.1f}x)")
+    return timings
+
+# -------------------------------
+# Transposition Table Keys
+# -------------------------------
+def bench_tt_keys(positions):
+    """Cost of push + key + table lookup + pop for FEN, full Zobrist and incremental Zobrist keys"""
+    fen_table = {}
+    zobrist_table = {}
+    for board in positions:
+        for move in board.legal_moves:
+            board.push(move)
+            fen_table[board.fen()] = 0
+            zobrist_table[zobrist_hash(board)] = 0
+            board.pop()
+
+    tracker = ZobristTracker()
+    variants = {
+        "fen": (lambda board, move: board.push(move),
+                lambda board: board.fen() in fen_table,
+                lambda board: board.pop(), fen_table),
+        "zobrist": (lambda board, move: board.push(move),
+                    lambda board: zobrist_hash(board) in zobrist_table,
+                    lambda board: board.pop(), zobrist_table),
+        "incremental": (tracker.push,
+                        lambda board: tracker.key(board) in zobrist_table,
+                        tracker.pop, zobrist_table)
+    }
+
+    results = {}
+    for name, (push, lookup, pop, table) in variants.items():
+        probes = 0
+        start_time = time.perf_counter()
+        for board in positions:
+            tracker.reset(board)
+            for move in list(board.legal_moves):
+                push(board, move)
+                lookup(board)
+                pop(board)
+                probes += 1
+        elapsed = time.perf_counter() - start_time
+        results[name] = {
+            "us_per_probe": elapsed / probes * 1e6,
+            "key_bytes": sum(sys.getsizeof(key) for key in table) / len(table)
+        }
+
+    print(f"\nTransposition keys ({probes} push/lookup/pop probes)")
+    for name, result in results.items():
+        print(f"  {name:12s} {result['us_per_probe']:6.1f} us/probe, {result['key_bytes']:.0f} bytes/key")
+    return results
+
+def bench_transposition_table(positions, depth=2, size_mb=16):
+    """Hit, collision and fill statistics of the transposition table over successive iterative-deepening searches"""
+    computer_player.resize_transposition_table(size_mb)
+    table = computer_player.transposition_table
+    for board in positions:
+        board = board.copy()
+        table.new_search()
+        computer_player.zobrist_keys.reset(board)
+        for current_depth in range(1, depth + 1):
+            computer_player.alphabeta(board, current_depth, -99999, 99999, board.turn == chess.WHITE)
+
+    stats = table.stats()
+    print(f"\nTransposition table ({size_mb} MB, {len(positions)} searches at depth {depth})")
+    print(f"  Hit rate: {stats['hit_rate']:.1%} | Collision rate: {stats['collision_rate']:.1%} | Fill: {stats['fill']:.2%}")
+    return stats
+
+def bench_eval_cache(positions, depth=2, budgets_mb=(0.0625, 1, 32)):
+    """Evaluation cache hit/miss/eviction counts over a game's searches for several byte budgets"""
+    results = {}
+    for size_mb in budgets_mb:
+        computer_player.resize_eval_cache(size_mb)
+        computer_player.transposition_table.clear()
+        for board in positions:
+            board = board.copy()
+            computer_player.zobrist_keys.reset(board)
+            for current_depth in range(1, depth + 1):
+                computer_player.alphabeta(board, current_depth, -99999, 99999, board.turn == chess.WHITE)
+        results[size_mb] = computer_player.nn_cache.stats()
+
+    print(f"\nEvaluation cache ({len(positions)} searches at depth {depth})")
+    for size_mb, stats in results.items():
+        print(f"  {size_mb:>7} MB: hit rate {stats['hit_rate']:.1%}, {stats['hits']} hits, "
+              f"{stats['misses']} misses, {stats['evictions']} evictions")
+    computer_player.resize_eval_cache(computer_player.EVAL_CACHE_MB)
+    return results
+
+# -------------------------------
+# Evaluator Throughput
+# -------------------------------
+def bench_evaluators(positions):
+    """Uncached evaluations/second of ChessEvaluator vs the incremental accumulator over child positions"""
+    accumulator = Accumulator(AccumulatorEvaluator())
+    results = {}
+
+    computer_player.nn_cache.clear()
+    model = computer_player.load_model()
+    evaluations = 0
+    start_time = time.perf_counter()
+    for board in positions:
+        for move in list(board.legal_moves):
+            board.push(move)
+            board_tensor, extra = computer_player.board_to_tensor(board)
+            with torch.no_grad():
+                model(board_tensor, extra).item()
+            board.pop()
+            evaluations += 1
+    results["cnn"] = evaluations / (time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    for board in positions:
+        accumulator.reset(board)
+        for move in list(board.legal_moves):
+            accumulator.push(board, move)
+            board.push(move)
+            accumulator.evaluate(board)
+            board.pop()
+            accumulator.pop(board)
+    results["nnue"] = evaluations / (time.perf_counter() - start_time)
+
+    print(f"\nEvaluator throughput ({evaluations} child positions)")
+    print(f"  ChessEvaluator:        {results['cnn']:.0f} evals/s")
+    print(f"  AccumulatorEvaluator:  {results['nnue']:.0f} evals/s (incremental)")
+    return results
+
+# -------------------------------
+# Parallel Search Scaling
+# -------------------------------
+def bench_smp_scaling(positions, worker_counts=(1, 2, 4, 8, 16), time_limit=1.0, max_depth=20):
+    """Nodes/second and depth reached by Lazy SMP at several worker counts, time_limit seconds per search"""
+    import smp
+
+    results = {}
+    for workers in worker_counts:
+        smp.get_pool(workers)  # Start processes outside the timed region
+        nodes = 0
+        depths = []
+        start_time = time.perf_counter()
+        for board in positions:
+            _, _, depth, search_nodes = smp.parallel_search(board, max_depth, time_limit, workers)
+            nodes += search_nodes
+            depths.append(depth)
+        elapsed = time.perf_counter() - start_time
+        results[workers] = {"nodes": nodes, "seconds": elapsed, "nps": nodes / elapsed,
+                            "mean_depth": sum(depths) / len(depths)}
+    smp.shutdown_pool()
+
+    base_nps = results[worker_counts[0]]["nps"]
+    print(f"\nLazy SMP scaling ({len(positions)} positions, {time_limit:.1f}s each, {os.cpu_count()} CPUs)")
+    for workers, result in results.items():
+        print(f"  {workers:2d} workers: {result['nps']:8.0f} nodes/s ({result['nps'] / base_nps:.2f}x), "
+              f"depth {result['mean_depth']:.1f}")
+    return results
+
+# -------------------------------
+# Time Management
+# -------------------------------
+def bench_time_budget(positions, budgets=(0.2, 1.0), max_depth=20):
+    """Largest overshoot of the hard time budget over searches that must be aborted"""
+    results = {}
+    for budget in budgets:
+        overshoots = []
+        for position in positions:
+            board = position.copy()
+            computer_player.prepare_search(board)
+            start_time = time.perf_counter()
+            computer_player.iterative_deepening(board, max_depth, budget)
+            overshoots.append(time.perf_counter() - start_time - budget)
+            if board != position:
+                raise AssertionError(f"Aborted search did not restore {position.fen()}")
+        results[budget] = {"max_overshoot_ms": max(overshoots) * 1000,
+                           "mean_overshoot_ms": sum(overshoots) / len(overshoots) * 1000}
+
+    print(f"\nHard time budget ({len(positions)} searches per budget)")
+    for budget, result in results.items():
+        print(f"  {budget:.2f}s budget: max overshoot {result['max_overshoot_ms']:.1f} ms, "
+              f"mean {result['mean_overshoot_ms']:.1f} ms")
+    return results
+
+# -------------------------------
+# Batched Evaluation
+# -------------------------------
+def bench_batched_eval(positions, batch_size=32):
+    """Compare per-position and batched nn_evaluate throughput"""
+    computer_player.nn_cache.clear()
+    start_time = time.perf_counter()
+    single_scores = [computer_player.nn_evaluate(board) for board in positions]
+    single_elapsed = time.perf_counter() - start_time
+
+    computer_player.nn_cache.clear()
+    start_time = time.perf_counter()
+    batched_scores = []
+    for i in range(0, len(positions), batch_size):
+        batched_scores += computer_player.nn_evaluate_many(positions[i:i + batch_size])
+    batched_elapsed = time.perf_counter() - start_time
+
+    max_diff = max(abs(a - b) for a, b in zip(single_scores, batched_scores))
+    results = {
+        "positions": len(positions),
+        "batch_size": batch_size,
+        "single_pos_per_sec": len(positions) / single_elapsed,
+        "batched_pos_per_sec": len(positions) / batched_elapsed,
+        "max_score_diff": max_diff
+    }
+
+    print(f"\nBatched evaluation ({len(positions)} positions, batch size {batch_size})")
+    print(f"  Per-position: {results['single_pos_per_sec']:.0f} pos/s")
+    print(f"  Batched:      {results['batched_pos_per_sec']:.0f} pos/s")
+    print(f"  Max score difference: {max_diff:.6f} cp")
+    return results
+
+# -------------------------------
+# Search Algorithms
+# -------------------------------
+@contextlib.contextmanager
+def restored_settings(*names):
+    """Put these computer_player globals back as they were when the block exits, however it exits"""
+    saved = {name: getattr(computer_player, name) for name in names}
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(computer_player, name, value)
+
+def bench_search_algorithms(positions, depth=3, algorithms=("alphabeta", "pvs")):
+    """Nodes and time to a fixed depth of each SEARCH_ALGORITHM, from cold caches"""
+    results = {}
+    with restored_settings("SEARCH_ALGORITHM"):
+        for algorithm in algorithms:
+            computer_player.SEARCH_ALGORITHM = algorithm
+            nodes = 0
+            start_time = time.perf_counter()
+            for position in positions:
+                board = position.copy()
+                computer_player.nn_cache.clear()
+                computer_player.transposition_table.clear()
+                computer_player.prepare_search(board)
+                computer_player.node_count = 0
+                computer_player.iterative_deepening(board, depth, None)
+                nodes += computer_player.node_count
+            results[algorithm] = {"nodes": nodes, "seconds": time.perf_counter() - start_time}
+
+    print(f"\nSearch algorithms ({len(positions)} positions to depth {depth})")
+    for algorithm, result in results.items():
+        print(f"  {algorithm:10s} {result['nodes']:8d} nodes, {result['seconds']:.1f}s to depth")
+    return results
+
+# -------------------------------
+# Move Ordering
+# -------------------------------
+class ReferenceOrderer:
+    """The previous order_moves: MVV/LVA, then checks and promotions, sorted over all legal moves"""
+
+    def new_search(self):
+        pass
+
+    def record_cutoff(self, board, move, depth, ply):
+        pass
+
+    def moves(self, board, hash_move=None, ply=0):
+        def score(move):
+            if board.is_capture(move):
+                victim = board.piece_type_at(move.to_square) or 0
+                attacker = board.piece_type_at(move.from_square) or 0
+                return (10 * computer_player.PIECE_VALUES.get(victim, 0)
+                        - computer_player.PIECE_VALUES.get(attacker, 0))
+            if board.gives_check(move):
+                return 500
+            if move.promotion:
+                return 300
+            return 0
+
+        moves = list(board.legal_moves)
+        moves.sort(key=score, reverse=True)
+        if hash_move in moves:
+            moves.remove(hash_move)
+            moves.insert(0, hash_move)
+        return moves
+
+def bench_move_ordering(positions, depth=3, algorithm="pvs"):
+    """Nodes and time to depth with the reference ordering and with staged killer/history ordering"""
+    from move_ordering import MoveOrderer
+
+    results = {}
+    with restored_settings("SEARCH_ALGORITHM", "move_orderer"):
+        computer_player.SEARCH_ALGORITHM = algorithm
+        for name, orderer in (("reference", ReferenceOrderer()), ("staged", MoveOrderer())):
+            computer_player.move_orderer = orderer
+            nodes = 0
+            start_time = time.perf_counter()
+            for position in positions:
+                board = position.copy()
+                computer_player.nn_cache.clear()
+                computer_player.transposition_table.clear()
+                computer_player.prepare_search(board)
+                computer_player.node_count = 0
+                computer_player.iterative_deepening(board, depth, None)
+                nodes += computer_player.node_count
+            results[name] = {"nodes": nodes, "seconds": time.perf_counter() - start_time}
+
+    reference, staged = results["reference"], results["staged"]
+    print(f"\nMove ordering ({len(positions)} positions to depth {depth}, {algorithm})")
+    for name, result in results.items():
+        print(f"  {name:10s} {result['nodes']:8d} nodes, {result['seconds']:.1f}s to depth")
+    print(f"  Nodes: {1 - staged['nodes'] / reference['nodes']:.1%} fewer | "
+          f"Time: {reference['seconds'] / staged['seconds']:.2f}x faster")
+    return results
+
+# -------------------------------
+# Quiescence Search
+# -------------------------------
+QSEARCH_CONFIGS = {
+    # The previous quiesce: every capture and check at every ply, no pruning
+    "unbounded": {"QSEARCH_MAX_DEPTH": None, "QSEARCH_CHECK_PLIES": None,
+                  "QSEARCH_DELTA": False, "QSEARCH_SEE": False},
+    "bounded": {"QSEARCH_MAX_DEPTH": computer_player.QSEARCH_MAX_DEPTH,
+                "QSEARCH_CHECK_PLIES": computer_player.QSEARCH_CHECK_PLIES,
+                "QSEARCH_DELTA": True, "QSEARCH_SEE": True},
+}
+
+def bench_quiescence(positions, depth=2, algorithm="pvs"):
+    """Nodes, quiescence node share and time to depth with and without the qsearch bounds"""
+    results = {}
+    with restored_settings("SEARCH_ALGORITHM", *QSEARCH_CONFIGS["bounded"]):
+        computer_player.SEARCH_ALGORITHM = algorithm
+        for name, config in QSEARCH_CONFIGS.items():
+            for setting, value in config.items():
+                setattr(computer_player, setting, value)
+            nodes = qsearch_nodes = 0
+            moves = []
+            start_time = time.perf_counter()
+            for position in positions:
+                board = position.copy()
+                computer_player.nn_cache.clear()
+                computer_player.transposition_table.clear()
+                computer_player.prepare_search(board)
+                computer_player.node_count = computer_player.qsearch_nodes = 0
+                move, _, _ = computer_player.iterative_deepening(board, depth, None)
+                nodes += computer_player.node_count
+                qsearch_nodes += computer_player.qsearch_nodes
+                moves.append(move)
+            results[name] = {"nodes": nodes, "qsearch_share": qsearch_nodes / max(nodes, 1),
+                             "seconds": time.perf_counter() - start_time, "moves": moves}
+
+    same = sum(a == b for a, b in zip(results["unbounded"]["moves"], results["bounded"]["moves"]))
+    print(f"\nQuiescence search ({len(positions)} positions to depth {depth}, {algorithm})")
+    for name, result in results.items():
+        print(f"  {name:10s} {result['nodes']:8d} nodes, {result['qsearch_share']:.1%} in qsearch, "
+              f"{result['seconds']:.1f}s to depth")
+    print(f"  Same move chosen in {same}/{len(positions)} positions")
+    return results
+
+# -------------------------------
+# Native Position
+# -------------------------------
+# Standard perft positions with their known node counts by depth
+PERFT_POSITIONS = [
+    (chess.STARTING_FEN, [20, 400, 8902, 197281]),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+    ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890]),
+]
+
+def bench_perft():
+    """Perft of Position and chess.Board against the known counts, in nodes/second"""
+    timings = {"position": 0.0, "board": 0.0}
+    nodes = 0
+    for fen, counts in PERFT_POSITIONS:
+        depth = len(counts)
+        for name in timings:
+            board = chess.Board(fen)
+            if name == "position":
+                board = Position(board)
+            start_time = time.perf_counter()
+            count = perft(board, depth)
+            timings[name] += time.perf_counter() - start_time
+            if count != counts[-1]:
+                raise AssertionError(f"{name} perft({depth}) of {fen} is {count}, expected {counts[-1]}")
+        nodes += counts[-1]
+
+    print(f"\nPerft ({len(PERFT_POSITIONS)} positions, {nodes} leaves, counts match)")
+    print(f"  chess.Board: {nodes / timings['board']:.0f} nodes/s")
+    print(f"  Position:    {nodes / timings['position']:.0f} nodes/s ({timings['board'] / timings['position']:.2f}x)")
+    return {name: nodes / seconds for name, seconds in timings.items()}
+
+def bench_native_search(positions, depth=3, algorithm="pvs"):
+    """Search on a native Position against searching the chess.Board itself"""
+    results = {}
+    with restored_settings("SEARCH_ALGORITHM", "NATIVE_POSITION"):
+        computer_player.SEARCH_ALGORITHM = algorithm
+        for native in (False, True):
+            computer_player.NATIVE_POSITION = native
+            nodes = 0
+            lines = []
+            start_time = time.perf_counter()
+            for position in positions:
+                board = position.copy()
+                computer_player.nn_cache.clear()
+                computer_player.attack_cache.clear()
+                computer_player.transposition_table.clear()
+                computer_player.move_orderer.clear()
+                computer_player.prepare_search(board)
+                computer_player.node_count = 0
+                lines.append(computer_player.iterative_deepening(board, depth, None))
+                nodes += computer_player.node_count
+            elapsed = time.perf_counter() - start_time
+            results["position" if native else "board"] = {"nodes": nodes, "seconds": elapsed,
+                                                          "nps": nodes / elapsed, "results": lines}
+
+    if results["position"]["results"] != results["board"]["results"]:
+        raise AssertionError("Native search returned different moves or scores")
+    print(f"\nNative search ({len(positions)} positions to depth {depth}, {algorithm}, identical results)")
+    for name, result in results.items():
+        print(f"  {name:9s} {result['nps']:7.0f} nodes/s, {result['seconds']:.1f}s to depth")
+    return results
+
+# -------------------------------
+# Regression Suite
+# -------------------------------
+# A fixed set of measurements written as JSON, so runs on different
+# commits can be compared. The bench_* comparisons above each pit one
+# optimization against the code it replaced; the suite only measures the
+# engine as it currently is.
+SUITE_SEARCH_POSITIONS = 10
+
+def git_revision():
+    """Short hash of the checked out commit, or None outside a git checkout"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+def bench_nn_evaluate(positions, repeats=3):
+    """Uncached nn_evaluate calls per second with the configured evaluator"""
+    for board in positions:
+        computer_player.prepare_search(board)
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        computer_player.nn_cache.clear()
+        for board in positions:
+            computer_player.nn_evaluate(board)
+    evals_per_sec = len(positions) * repeats / (time.perf_counter() - start_time)
+    computer_player.nn_cache.clear()
+
+    print(f"\nnn_evaluate ({len(positions)} positions, {computer_player.EVALUATOR}, uncached)")
+    print(f"  {evals_per_sec:.0f} evals/s")
+    return {"evaluator": computer_player.EVALUATOR, "evals_per_sec": evals_per_sec}
+
+def bench_difficulties(positions, difficulties=("easy", "medium", "hard")):
+    """Depth reached, time, nodes/second and cache hit rates of each difficulty, from cold caches
+
+    Each search has the difficulty's depth and TIME_LIMITS budget, as in
+    play, so the suite takes at most the sum of the budgets per position.
+    """
+    results = {}
+    for difficulty in difficulties:
+        depth = computer_player.DEPTH_SETTINGS[difficulty]
+        time_limit = computer_player.TIME_LIMITS[difficulty]
+        computer_player.nn_cache.clear()
+        computer_player.attack_cache.clear()
+        computer_player.transposition_table.clear()
+        computer_player.move_orderer.clear()
+        nodes = qsearch_nodes = 0
+        times = []
+        depths = []
+        for position in positions:
+            board = position.copy()
+            computer_player.prepare_search(board)
+            computer_player.node_count = computer_player.qsearch_nodes = 0
+            start_time = time.perf_counter()
+            _, _, depth_reached = computer_player.iterative_deepening(board, depth, time_limit)
+            times.append(time.perf_counter() - start_time)
+            depths.append(depth_reached)
+            nodes += computer_player.node_count
+            qsearch_nodes += computer_player.qsearch_nodes
+        table = computer_player.transposition_table.stats()
+        results[difficulty] = {
+            "depth": depth,
+            "time_limit": time_limit,
+            "mean_depth": sum(depths) / len(depths),
+            "nodes": nodes,
+            "nps": nodes / sum(times),
+            "qsearch_share": qsearch_nodes / max(nodes, 1),
+            "mean_time": sum(times) / len(times),
+            "max_time": max(times),
+            "tt_hit_rate": table["hit_rate"],
+            "tt_collision_rate": table["collision_rate"],
+            "eval_cache_hit_rate": computer_player.nn_cache.stats()["hit_rate"],
+            "attack_cache_hit_rate": computer_player.attack_cache.stats()["hit_rate"]
+        }
+
+    print(f"\nDifficulties ({len(positions)} positions, {computer_player.SEARCH_ALGORITHM})")
+    for difficulty, result in results.items():
+        print(f"  {difficulty:6s} depth {result['mean_depth']:.1f}/{result['depth']} in {result['time_limit']:.1f}s: "
+              f"{result['mean_time']:.2f}s mean, "
+              f"{result['nps']:.0f} nodes/s | TT hits {result['tt_hit_rate']:.1%} | "
+              f"Eval cache hits {result['eval_cache_hit_rate']:.1%}")
+    return results
+
+def run_suite(pgn_path="sample_1000.pgn", max_games=20, search_positions=SUITE_SEARCH_POSITIONS):
+    """Run the regression suite over positions sampled from pgn_path and return its results"""
+    positions = load_positions(pgn_path, max_games)
+    encoding = bench_board_to_tensor(positions)
+    perft_nps = bench_perft()
+    evaluation = bench_nn_evaluate(positions)
+    search = bench_difficulties(positions[:search_positions])
+    return {
+        "commit": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "positions": {"pgn": os.path.basename(pgn_path), "sampled": len(positions),
+                      "searched": min(search_positions, len(positions))},
+        "settings": {
+            "search_algorithm": computer_player.SEARCH_ALGORITHM,
+            "evaluator": computer_player.EVALUATOR,
+            "native_position": computer_player.NATIVE_POSITION,
+            "tt_size_mb": computer_player.TT_SIZE_MB,
+            "eval_cache_mb": computer_player.EVAL_CACHE_MB,
+            "torch_threads": torch.get_num_threads()
+        },
+        "perft_nps": perft_nps,
+        "board_to_tensor_per_sec": encoding["bitboard"],
+        "nn_evaluate": evaluation,
+        "search": search
+    }
+
+def run_comparisons(positions):
+    """Each optimization against the code it replaced"""
+    bench_board_to_tensor(positions)
+    bench_tt_keys(positions)
+    bench_attack_bonus(positions)
+    bench_transposition_table(positions[:5])
+    bench_eval_cache(positions[:3])
+    bench_evaluators(positions)
+    bench_time_budget(positions[:10])
+    bench_batched_eval(positions)
+    bench_search_algorithms(positions[:5])
+    bench_move_ordering(positions[:10])
+    bench_quiescence(positions[:10])
+    bench_native_search(positions[:10])
+    bench_smp_scaling(positions[:3])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Engine benchmark suite")
+    parser.add_argument("--pgn", default="sample_1000.pgn", help="games to sample positions from")
+    parser.add_argument("--games", type=int, default=20, help="number of games to sample")
+    parser.add_argument("--algorithm", choices=("alphabeta", "pvs"), help="search algorithm to measure")
+    parser.add_argument("--output", help="write the suite results to this JSON file (default: stdout)")
+    parser.add_argument("--compare", action="store_true",
+                        help="run the before/after comparisons instead of the suite")
+    args = parser.parse_args()
+    if args.algorithm:
+        computer_player.SEARCH_ALGORITHM = args.algorithm
+
+    if args.compare:
+        run_comparisons(load_positions(args.pgn, args.games))
+        bench_perft()
+    else:
+        # The bench_* progress text goes to stderr so stdout is only the JSON document
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run_suite(args.pgn, args.games)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+        else:
+            print(json.dumps(results, indent=2))
\ No newline at end of file
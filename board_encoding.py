@@ -0,0 +1,104 @@
+import chess
+import numpy as np
+
+# -------------------------------
+# Bitboard Board Encoding
+# -------------------------------
+# Channel layout matches ChessEvaluator's input: white pawn, knight, bishop,
+# rook, queen, king in channels 0-5, black pieces in channels 6-11, row 0
+# holding rank 8.
+
+def piece_bitboards(board):
+    """The 12 piece bitboards of a position in channel order"""
+    white = board.occupied_co[chess.WHITE]
+    black = board.occupied_co[chess.BLACK]
+    pieces = (board.pawns, board.knights, board.bishops,
+              board.rooks, board.queens, board.kings)
+    return [mask & white for mask in pieces] + [mask & black for mask in pieces]
+
+def extra_features(board):
+    """Castling rights and side to move, as fed next to the planes"""
+    return [
+        board.has_kingside_castling_rights(chess.WHITE),
+        board.has_queenside_castling_rights(chess.WHITE),
+        board.has_kingside_castling_rights(chess.BLACK),
+        board.has_queenside_castling_rights(chess.BLACK),
+        board.turn == chess.WHITE
+    ]
+
+def game_phase(board):
+    """Detect current game phase for aggressive play"""
+    # Count pieces
+    queens = chess.popcount(board.queens)
+    minors = chess.popcount(board.knights | board.bishops)
+    
+    # Determine phase
+    if queens == 0 or (queens == 2 and minors <= 4):
+        return "endgame"
+    elif board.fullmove_number < 10:
+        return "opening"
+    return "middlegame"
+
+def square_features(board):
+    """The MLP's 68 inputs: signed piece type per square (white positive), then the castling rights"""
+    features = [0] * 64
+    for piece_type in chess.PIECE_TYPES:
+        mask = board.pieces_mask(piece_type, chess.WHITE)
+        for square in chess.scan_forward(mask):
+            features[square] = piece_type
+        mask = board.pieces_mask(piece_type, chess.BLACK)
+        for square in chess.scan_forward(mask):
+            features[square] = -piece_type
+    return features + [
+        int(board.has_kingside_castling_rights(chess.WHITE)),
+        int(board.has_queenside_castling_rights(chess.WHITE)),
+        int(board.has_kingside_castling_rights(chess.BLACK)),
+        int(board.has_queenside_castling_rights(chess.BLACK))
+    ]
+
+def unpack_planes(bitboards, out):
+    """Unpack (..., 12) bitboards into (..., 12, 8, 8) planes written to out"""
+    masks = np.asarray(bitboards, dtype="<u8")
+    # Little-endian bytes are ranks 1-8, little bit order within a byte is files a-h
+    bits = np.unpackbits(masks.view(np.uint8), bitorder="little")
+    bits = bits.reshape(masks.shape + (8, 8))
+    out[...] = bits[..., ::-1, :]
+    return out
+
+def unpack_features(bitboards, out):
+    """Unpack (..., 12) bitboards into (..., 768) one-hot features, index channel * 64 + square"""
+    masks = np.asarray(bitboards, dtype="<u8")
+    bits = np.unpackbits(masks.view(np.uint8), bitorder="little")
+    out[...] = bits.reshape(masks.shape[:-1] + (768,))
+    return out
+
+def piece_changes(board, move):
+    """(removed, added) (color, piece_type, square) triples of a move, before it is pushed"""
+    if not move:  # Null move
+        return [], []
+
+    color = board.turn
+    from_square, to_square = move.from_square, move.to_square
+    piece_type = board.piece_type_at(from_square)
+
+    if piece_type == chess.KING and board.is_castling(move):
+        kingside = board.is_kingside_castling(move)
+        rank = chess.square_rank(from_square)
+        if board.occupied_co[color] & chess.BB_SQUARES[to_square]:
+            rook_from = to_square  # King-takes-rook notation
+        else:
+            rook_from = chess.square(7 if kingside else 0, rank)
+        removed = [(color, chess.KING, from_square), (color, chess.ROOK, rook_from)]
+        added = [(color, chess.KING, chess.square(6 if kingside else 2, rank)),
+                 (color, chess.ROOK, chess.square(5 if kingside else 3, rank))]
+        return removed, added
+
+    removed = [(color, piece_type, from_square)]
+    captured = board.piece_type_at(to_square)
+    if captured:
+        removed.append((not color, captured, to_square))
+    elif piece_type == chess.PAWN and to_square == board.ep_square:
+        captured_square = to_square - 8 if color == chess.WHITE else to_square + 8
+        removed.append((not color, chess.PAWN, captured_square))
+
+    return removed, [(color, move.promotion or piece_type, to_square)]
@@ -1,9 +1,19 @@
 import chess
+import cProfile
 import random
+import threading
 import time
 import torch
 import numpy as np
 from torch import nn
+from board_encoding import piece_bitboards, extra_features, unpack_planes, game_phase
+from zobrist import ZobristTracker
+from eval_cache import EvalCache
+from nnue import AccumulatorEvaluator, Accumulator
+from transposition import TranspositionTable, EXACT, LOWERBOUND, UPPERBOUND
+from time_manager import TimeManager, SearchAborted, allocate_time
+from move_ordering import MoveOrderer, capture_score, static_exchange
+from position import Position
 
 # -------------------------------
 # PyTorch Model Definition
@@ -29,122 +39,328 @@ class ChessEvaluator(nn.Module):
         x = torch.cat([x, extra], dim=1)
         return self.fc_layers(x)
 
-# Global model instance
+# Global model instance, built on first use (or by load_model) so that
+# importing this module does not pay for reading the weights
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = ChessEvaluator().to(device)
-model.load_state_dict(torch.load("chess_evaluator_2mil.pth"))
-model.eval()
+MODEL_WEIGHTS = "chess_evaluator_2mil.pth"
+model = None
+_model_lock = threading.Lock()
 
-# Cache for neural network evaluations
-nn_cache = {}
-MAX_CACHE_SIZE = 10000
+def load_model():
+    """Build the evaluator network and load its weights, once (safe to call from any thread)"""
+    global model
+    with _model_lock:
+        if model is None:
+            evaluator = ChessEvaluator().to(device)
+            evaluator.load_state_dict(torch.load(MODEL_WEIGHTS))
+            evaluator.eval()
+            model = evaluator
+    return model
+
+# -------------------------------
+# Evaluator Selection
+# -------------------------------
+# "cnn":  ChessEvaluator, a full forward pass per position (batched where possible)
+# "nnue": AccumulatorEvaluator, first layer updated incrementally on make/unmake
+EVALUATOR = "cnn"
+ACCUMULATOR_WEIGHTS = "chess_accumulator.pth"
+accumulator = None
+accumulator_weights = None
+
+def set_evaluator(name, weights_path=ACCUMULATOR_WEIGHTS):
+    """Switch the evaluator used by nn_evaluate"""
+    global EVALUATOR, accumulator, accumulator_weights
+    if name == "nnue":
+        evaluator = AccumulatorEvaluator()
+        evaluator.load_state_dict(torch.load(weights_path, map_location="cpu"))
+        accumulator = Accumulator(evaluator)
+        accumulator_weights = weights_path
+    elif name == "cnn":
+        accumulator = None
+        accumulator_weights = None
+    else:
+        raise ValueError(f"Unknown evaluator: {name}")
+    EVALUATOR = name
+    nn_cache.clear()
+
+# Cache for neural network evaluations, keyed by Zobrist hash. LRU
+# bounded in bytes, shared by successive select_best_move calls.
+EVAL_CACHE_MB = 32
+nn_cache = EvalCache(EVAL_CACHE_MB * 1024 * 1024)
+
+def resize_eval_cache(size_mb):
+    """Replace the evaluation cache with an empty one of size_mb megabytes"""
+    global nn_cache
+    nn_cache = EvalCache(size_mb * 1024 * 1024)
+
+# Zobrist key of the board being searched, updated on every push/pop
+zobrist_keys = ZobristTracker()
+
+def track_board(board):
+    """Follow board's moves with the incremental key and accumulator"""
+    zobrist_keys.reset(board)
+    if accumulator is not None:
+        accumulator.reset(board)
+
+def make_move(board, move):
+    """Push a move, keeping the search's incremental state in step"""
+    if accumulator is not None:
+        accumulator.push(board, move)
+    zobrist_keys.push(board, move)
+
+def unmake_move(board):
+    """Pop the last move, keeping the search's incremental state in step"""
+    zobrist_keys.pop(board)
+    if accumulator is not None:
+        accumulator.pop(board)
+
+def position_key(board):
+    """64-bit Zobrist key of a position"""
+    return zobrist_keys.key(board)
 
 # -------------------------------
 # Board to Tensor Conversion
 # -------------------------------
+# board_to_tensor fills these buffers in place and returns tensors sharing
+# their memory: the result is only valid until the next call.
+_board_buffer = np.zeros((1, 12, 8, 8), dtype=np.float32)
+_extra_buffer = np.zeros((1, 5), dtype=np.float32)
+_board_tensor = torch.from_numpy(_board_buffer)
+_extra_tensor = torch.from_numpy(_extra_buffer)
+
 def board_to_tensor(board):
-    """Convert chess board to PyTorch tensor"""
-    tensor = torch.zeros((12, 8, 8), dtype=torch.float32)
-    piece_to_channel = {
-        chess.PAWN: 0, chess.KNIGHT: 1, chess.BISHOP: 2,
-        chess.ROOK: 3, chess.QUEEN: 4, chess.KING: 5
-    }
-    
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece:
-            channel = piece_to_channel[piece.piece_type]
-            if piece.color == chess.BLACK:
-                channel += 6
-            row, col = 7 - square // 8, square % 8
-            tensor[channel, row, col] = 1
-    
-    extra = torch.tensor([
-        board.has_kingside_castling_rights(chess.WHITE),
-        board.has_queenside_castling_rights(chess.WHITE),
-        board.has_kingside_castling_rights(chess.BLACK),
-        board.has_queenside_castling_rights(chess.BLACK),
-        board.turn == chess.WHITE
-    ], dtype=torch.float32)
-    
-    return tensor.unsqueeze(0), extra.unsqueeze(0)
+    """Convert chess board to PyTorch tensor (reused buffer, clone to keep it)"""
+    unpack_planes(piece_bitboards(board), _board_buffer[0])
+    _extra_buffer[0] = extra_features(board)
+    return _board_tensor, _extra_tensor
 
 # -------------------------------
 # Neural Network Evaluation with Caching
 # -------------------------------
-def nn_evaluate(board):
-    """Evaluate position using neural network with caching"""
-    if board.is_checkmate():
-        return -99999 if board.turn == chess.WHITE else 99999
-    
-    fen = board.fen()
-    if fen in nn_cache:
-        return nn_cache[fen]
-    
-    board_tensor, extra_features = board_to_tensor(board)
-    with torch.no_grad():
-        evaluation = model(
-            board_tensor.to(device),
-            extra_features.to(device)
-        ).item() * 1000  # Scale to centipawns
-    
-    # Add aggression bonus based on material imbalance
-    material_diff = sum(
+def material_balance(board):
+    """Material difference (white minus black) in centipawns"""
+    return sum(
         PIECE_VALUES[pt] * (len(board.pieces(pt, chess.WHITE)) - len(board.pieces(pt, chess.BLACK)))
         for pt in PIECE_VALUES
     )
+
+def finish_evaluation(raw_output, material_diff):
+    """Turn raw network output into a centipawn score with aggression bonus"""
+    evaluation = raw_output * 1000  # Scale to centipawns
+    
+    # Add aggression bonus based on material imbalance
     aggression_bonus = 0
     if abs(material_diff) > 200:  # Significant material advantage
         # Encourage aggressive play when ahead
         aggression_bonus = material_diff * 0.1
     
-    evaluation += aggression_bonus
+    return evaluation + aggression_bonus
+
+def cache_evaluation(key, evaluation):
+    """Store an evaluation, evicting the least recently used ones if full"""
+    nn_cache.put(key, evaluation)
+
+def network_output(board):
+    """Raw network score of board, before the material and aggression terms"""
+    if accumulator is not None:
+        return accumulator.evaluate(board)
+    board_tensor, extra_features = board_to_tensor(board)
+    if model is None:
+        load_model()
+    with torch.no_grad():
+        return model(
+            board_tensor.to(device),
+            extra_features.to(device)
+        ).item()
+
+def nn_evaluate(board):
+    """Evaluate position using neural network with caching"""
+    if board.is_checkmate():
+        return -99999 if board.turn == chess.WHITE else 99999
     
-    # Manage cache size
-    if len(nn_cache) >= MAX_CACHE_SIZE:
-        nn_cache.clear()
+    key = position_key(board)
+    cached = nn_cache.get(key)
+    if cached is not None:
+        return cached
     
-    nn_cache[fen] = evaluation
+    if search_stats is None:
+        output = network_output(board)
+    else:
+        start_time = time.perf_counter()
+        output = network_output(board)
+        search_stats.record_nn(1, time.perf_counter() - start_time)
+    
+    evaluation = finish_evaluation(output, material_balance(board))
+    cache_evaluation(key, evaluation)
     return evaluation
 
+# -------------------------------
+# Batched Neural Network Evaluation
+# -------------------------------
+# One forward pass over sibling leaves instead of one per leaf: at batch
+# size 1 the per-call overhead of the model dominates on CPU.
+BATCH_EVAL = True
+MIN_BATCH_SIZE = 2
+# Children are batched PREFETCH_MOVES at a time, so a cutoff wastes at most
+# the rest of a window. Windows start after the first move where most
+# cutoffs come from the hash move.
+PREFETCH_MOVES = 8
+
+def pending_entry(board):
+    """Inputs for a batched evaluation, or None if the position is already cached"""
+    # Checkmates are not filtered out here: nn_evaluate checks for mate
+    # before consulting the cache, so a cached network score is never used.
+    key = position_key(board)
+    if key in nn_cache:
+        return None
+    return key, piece_bitboards(board), extra_features(board), material_balance(board)
+
+def evaluate_batch(pending):
+    """Score pending entries in a single model call and cache the results"""
+    if not pending:
+        return []
+    
+    planes = np.empty((len(pending), 12, 8, 8), dtype=np.float32)
+    unpack_planes([entry[1] for entry in pending], planes)
+    extras = np.array([entry[2] for entry in pending], dtype=np.float32)
+    if model is None:
+        load_model()
+    if search_stats is not None:
+        start_time = time.perf_counter()
+    with torch.no_grad():
+        outputs = model(
+            torch.from_numpy(planes).to(device),
+            torch.from_numpy(extras).to(device)
+        ).view(-1).tolist()
+    if search_stats is not None:
+        search_stats.record_nn(len(pending), time.perf_counter() - start_time)
+    
+    evaluations = []
+    for (key, _, _, material_diff), output in zip(pending, outputs):
+        evaluation = finish_evaluation(output, material_diff)
+        cache_evaluation(key, evaluation)
+        evaluations.append(evaluation)
+    return evaluations
+
+def nn_evaluate_many(boards):
+    """Evaluate several positions, running the uncached ones as one batch"""
+    if accumulator is not None:
+        return [nn_evaluate(board) for board in boards]
+    
+    pending = []
+    seen = set()
+    for board in boards:
+        entry = pending_entry(board)
+        if entry and entry[0] not in seen:
+            seen.add(entry[0])
+            pending.append(entry)
+    evaluate_batch(pending)
+    return [nn_evaluate(board) for board in boards]
+
+def prefetch_evaluations(board, moves):
+    """Batch-evaluate the children reached by moves so their nn_evaluate calls hit the cache"""
+    if not BATCH_EVAL or accumulator is not None or len(moves) < MIN_BATCH_SIZE:
+        return
+    
+    pending = []
+    seen = set()
+    for move in moves:
+        make_move(board, move)
+        entry = pending_entry(board)
+        unmake_move(board)
+        if entry and entry[0] not in seen:
+            seen.add(entry[0])
+            pending.append(entry)
+    
+    if len(pending) >= MIN_BATCH_SIZE:
+        # A batch is the most expensive step between node-count deadline checks
+        time_manager.check()
+        evaluate_batch(pending)
+
+def prefetch_window(board, moves, index, first=1):
+    """Prefetch the window of moves starting at index, when one starts there (windows start at first)"""
+    if index >= first and (index - first) % PREFETCH_MOVES == 0:
+        prefetch_evaluations(board, moves[index:index + PREFETCH_MOVES])
+
 # -------------------------------
 # Phase Detection and Bonuses
 # -------------------------------
-def game_phase(board):
-    """Detect current game phase for aggressive play"""
-    # Count pieces
-    queens = len(board.pieces(chess.QUEEN, chess.WHITE)) + len(board.pieces(chess.QUEEN, chess.BLACK))
-    minors = len(board.pieces(chess.KNIGHT, chess.WHITE)) + len(board.pieces(chess.KNIGHT, chess.BLACK)) + \
-             len(board.pieces(chess.BISHOP, chess.WHITE)) + len(board.pieces(chess.BISHOP, chess.BLACK))
-    
-    # Determine phase
-    if queens == 0 or (queens == 2 and minors <= 4):
-        return "endgame"
-    elif board.fullmove_number < 10:
-        return "opening"
-    return "middlegame"
+# Enemy territory of each side: ranks 5-8 for White, 1-4 for Black
+WHITE_TERRITORY = chess.BB_RANK_5 | chess.BB_RANK_6 | chess.BB_RANK_7 | chess.BB_RANK_8
+BLACK_TERRITORY = chess.BB_RANK_1 | chess.BB_RANK_2 | chess.BB_RANK_3 | chess.BB_RANK_4
+
+# Middlegame bonuses keyed by Zobrist hash; they depend on the position only
+ATTACK_CACHE_MB = 8
+attack_cache = EvalCache(ATTACK_CACHE_MB * 1024 * 1024)
+
+def checking_moves(board):
+    """Set of the legal moves that give check
+
+    Direct checks are read off attack masks from the enemy king. Only
+    moves that can check in other ways (discovered checks, promotions,
+    en passant and castling) are played out with gives_check.
+    """
+    us, them = board.turn, not board.turn
+    king = board.king(them)
+    if king is None:
+        return {move for move in board.legal_moves if board.gives_check(move)}
+    
+    occupied = board.occupied
+    ours = board.occupied_co[us]
+    diagonal = chess.BB_DIAG_ATTACKS[king][chess.BB_DIAG_MASKS[king] & occupied]
+    straight = (chess.BB_RANK_ATTACKS[king][chess.BB_RANK_MASKS[king] & occupied]
+                | chess.BB_FILE_ATTACKS[king][chess.BB_FILE_MASKS[king] & occupied])
+    promoting = board.pawns & ours & (chess.BB_RANK_7 if us == chess.WHITE else chess.BB_RANK_2)
+    
+    # Squares each piece type checks the king from
+    checks = set()
+    for pieces, targets in ((board.pawns & ~promoting, chess.BB_PAWN_ATTACKS[them][king]),
+                            (board.knights, chess.BB_KNIGHT_ATTACKS[king]),
+                            (board.bishops, diagonal),
+                            (board.rooks, straight),
+                            (board.queens, diagonal | straight)):
+        if pieces & ours and targets:
+            checks.update(board.generate_legal_moves(pieces & ours, targets))
+    
+    # Our pieces that alone stand between the king and one of our sliders
+    snipers = ((chess.BB_RANK_ATTACKS[king][0] | chess.BB_FILE_ATTACKS[king][0]) & (board.rooks | board.queens)
+               | chess.BB_DIAG_ATTACKS[king][0] & (board.bishops | board.queens)) & ours
+    blockers = 0
+    for sniper in chess.scan_reversed(snipers):
+        between = chess.between(king, sniper) & occupied
+        if between and between & (between - 1) == 0:
+            blockers |= between & ours
+    
+    candidates = []
+    if blockers | promoting:
+        candidates.extend(board.generate_legal_moves(blockers | promoting))
+    candidates.extend(board.generate_legal_ep())
+    candidates.extend(board.generate_castling_moves())
+    for move in candidates:
+        if move not in checks and board.gives_check(move):
+            checks.add(move)
+    return checks
 
 def attack_bonus(board):
     """Bonus for attacking moves in middlegame"""
-    bonus = 0
-    phase = game_phase(board)
-    
-    if phase == "middlegame":
-        # Bonus for pieces in enemy territory
-        for color in [chess.WHITE, chess.BLACK]:
-            enemy_side = 4 if color == chess.WHITE else 3
-            for piece_type in [chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN]:
-                for square in board.pieces(piece_type, color):
-                    rank = chess.square_rank(square)
-                    if (color == chess.WHITE and rank >= enemy_side) or \
-                       (color == chess.BLACK and rank <= enemy_side):
-                        bonus += 15 if color == chess.WHITE else -15
-        
-        # Bonus for checks
-        for move in board.legal_moves:
-            if board.gives_check(move):
-                bonus += 10 if board.turn == chess.WHITE else -10
+    if game_phase(board) != "middlegame":
+        return 0
+    
+    key = position_key(board)
+    bonus = attack_cache.get(key)
+    if bonus is not None:
+        return bonus
+    
+    # Bonus for pieces in enemy territory
+    pieces = board.knights | board.bishops | board.rooks | board.queens
+    bonus = 15 * (chess.popcount(pieces & board.occupied_co[chess.WHITE] & WHITE_TERRITORY)
+                  - chess.popcount(pieces & board.occupied_co[chess.BLACK] & BLACK_TERRITORY))
+    
+    # Bonus for checks
+    checks = len(checking_moves(board))
+    bonus += 10 * checks if board.turn == chess.WHITE else -10 * checks
     
+    attack_cache.put(key, bonus)
     return bonus
 
 # -------------------------------
@@ -183,53 +399,110 @@ PIECE_VALUES = {
     chess.KING: 20000
 }
 
-# Transposition table for search results
-transposition_table = {}
-MAX_TT_SIZE = 10000
+# Transposition table for search results, keyed by Zobrist hash.
+# Fixed size, kept across moves; select_best_move only ages its entries.
+TT_SIZE_MB = 16
+transposition_table = TranspositionTable(TT_SIZE_MB)
+
+# Nodes visited by alphabeta and quiesce since the last reset, and the
+# share of them that were quiescence nodes
+node_count = 0
+qsearch_nodes = 0
+
+# SearchStats of the running search, installed by select_best_move when
+# asked for (None = no instrumentation)
+search_stats = None
+
+# Killer moves and history table, kept across moves like the TT
+move_orderer = MoveOrderer()
+
+# Deadline of the running search, checked every TIME_CHECK_NODES nodes
+time_manager = TimeManager()
+TIME_CHECK_NODES = 8
+
+def resize_transposition_table(size_mb):
+    """Replace the transposition table with an empty one of size_mb megabytes"""
+    global transposition_table
+    transposition_table = TranspositionTable(size_mb)
 
 # -------------------------------
 # Aggressive Search Algorithms
 # -------------------------------
-def order_moves(board):
-    """MVV/LVA move ordering for aggressive play"""
-    def score(move):
-        # Prioritize captures
-        if board.is_capture(move):
-            victim = board.piece_type_at(move.to_square) or 0
-            attacker = board.piece_type_at(move.from_square) or 0
-            return 10 * PIECE_VALUES.get(victim, 0) - PIECE_VALUES.get(attacker, 0)
-        
-        # Prioritize checks
-        if board.gives_check(move):
-            return 500
-        
-        # Prioritize promotions
-        if move.promotion:
-            return 300
-            
-        # Default value
-        return 0
-        
-    moves = list(board.legal_moves)
-    moves.sort(key=score, reverse=True)
-    return moves
+def order_moves(board, hash_move=None, ply=0):
+    """Hash move, MVV/LVA captures, killers, then quiets by history"""
+    moves = move_orderer.moves(board, hash_move, ply)
+    if search_stats is not None:
+        moves = search_stats.timed_moves(moves)
+    return list(moves)
 
-def quiesce(board, alpha, beta):
-    """Quiescence search to capture aggressive tactics"""
-    stand_pat = nn_evaluate(board) + attack_bonus(board)
+# Quiescence limits: capture plies below the horizon (None = unbounded),
+# plies at which quiet checks are still tried, and the pruning of
+# captures that cannot raise alpha (delta) or lose material (SEE)
+QSEARCH_MAX_DEPTH = 8
+QSEARCH_CHECK_PLIES = 1
+QSEARCH_DELTA = True
+QSEARCH_SEE = True
+DELTA_MARGIN = 200
+
+def static_eval(board, relative=False):
+    """Stand-pat score: network evaluation plus attack bonus
+
+    From White's point of view, or the side to move's with relative=True.
+    """
+    score = nn_evaluate(board) + attack_bonus(board)
+    if relative and board.turn == chess.BLACK:
+        return -score
+    return score
+
+def quiesce(board, alpha, beta, relative=False, qply=0):
+    """Quiescence search to capture aggressive tactics
+
+    relative=True scores from the side to move's point of view, as the
+    negamax pvs search expects. Delta pruning compares stand_pat with alpha
+    for the side to move, so it needs that point of view and is skipped
+    otherwise; SEE pruning is always from the mover's side.
+    """
+    global node_count, qsearch_nodes
+    node_count += 1
+    qsearch_nodes += 1
+    if node_count % TIME_CHECK_NODES == 0:
+        time_manager.check()
+    
+    stand_pat = static_eval(board, relative)
     if stand_pat >= beta:
         return beta
     if stand_pat > alpha:
         alpha = stand_pat
+    if QSEARCH_MAX_DEPTH is not None and qply >= QSEARCH_MAX_DEPTH:
+        return alpha
         
-    # Consider captures and checks
-    for move in board.legal_moves:
-        if not (board.is_capture(move) or board.gives_check(move)):
+    # Consider captures that can raise alpha without losing material
+    if search_stats is not None:
+        start_time = time.perf_counter()
+    moves = []
+    for move in board.generate_legal_captures():
+        if QSEARCH_DELTA and relative:
+            gain = PIECE_VALUES.get(board.piece_type_at(move.to_square), PIECE_VALUES[chess.PAWN])
+            if move.promotion:
+                gain += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+            if stand_pat + gain + DELTA_MARGIN <= alpha:
+                continue
+        if QSEARCH_SEE and static_exchange(board, move) < 0:
             continue
-            
-        board.push(move)
-        score = -quiesce(board, -beta, -alpha)
-        board.pop()
+        moves.append(move)
+    moves.sort(key=lambda move: capture_score(board, move), reverse=True)
+    
+    # and quiet checks near the horizon
+    if QSEARCH_CHECK_PLIES is None or qply < QSEARCH_CHECK_PLIES:
+        moves.extend(move for move in checking_moves(board) if not board.is_capture(move))
+    if search_stats is not None:
+        search_stats.movegen_time += time.perf_counter() - start_time
+    
+    for index, move in enumerate(moves):
+        prefetch_window(board, moves, index)
+        make_move(board, move)
+        score = -quiesce(board, -beta, -alpha, relative, qply + 1)
+        unmake_move(board)
         
         if score >= beta:
             return beta
@@ -238,37 +511,61 @@ def quiesce(board, alpha, beta):
             
     return alpha
 
-def alphabeta(board, depth, alpha, beta, maximizing):
+def alphabeta(board, depth, alpha, beta, maximizing, ply=0):
     """Alpha-beta search with transposition table"""
+    global node_count
+    node_count += 1
+    if node_count % TIME_CHECK_NODES == 0:
+        time_manager.check()
+    
     # Check transposition table
-    key = board.fen()
-    if key in transposition_table:
-        tt_entry = transposition_table[key]
-        if tt_entry["depth"] >= depth:
-            if tt_entry["flag"] == "exact":
-                return tt_entry["score"], tt_entry["best_move"]
-            elif tt_entry["flag"] == "lowerbound":
-                alpha = max(alpha, tt_entry["score"])
-            elif tt_entry["flag"] == "upperbound":
-                beta = min(beta, tt_entry["score"])
+    key = position_key(board)
+    tt_move = None
+    tt_entry = transposition_table.probe(key)
+    if tt_entry is not None:
+        tt_score, tt_move, tt_depth, tt_flag = tt_entry
+        tt_score = score_from_table(tt_score, ply)
+        if tt_depth >= depth:
+            if tt_flag == EXACT:
+                if search_stats is not None:
+                    search_stats.tt_cutoffs += 1
+                return tt_score, tt_move
+            elif tt_flag == LOWERBOUND:
+                alpha = max(alpha, tt_score)
+            elif tt_flag == UPPERBOUND:
+                beta = min(beta, tt_score)
                 
             if alpha >= beta:
-                return tt_entry["score"], tt_entry["best_move"]
+                if search_stats is not None:
+                    search_stats.tt_cutoffs += 1
+                return tt_score, tt_move
 
-    # Terminal node or depth limit
+    # Terminal node or depth limit; mates found here are scored by distance from the root
+    if board.is_checkmate():
+        return (-MATE_SCORE + ply if board.turn == chess.WHITE else MATE_SCORE - ply), None
     if depth == 0 or board.is_game_over():
         qs = quiesce(board, alpha, beta)
         return qs, None
 
     best_move = None
     best_score = -99999 if maximizing else 99999
-    flag = "upperbound" if maximizing else "lowerbound"
+    flag = UPPERBOUND if maximizing else LOWERBOUND
 
-    for move in order_moves(board):
-        board.push(move)
-        score, _ = alphabeta(board, depth - 1, -beta, -alpha, not maximizing)
+    moves = move_orderer.moves(board, tt_move, ply)
+    if search_stats is not None:
+        moves = search_stats.timed_moves(moves)
+    if depth == 1:
+        # Every child is a quiescence leaf: score their stand-pats together
+        moves = list(moves)
+    
+    for index, move in enumerate(moves):
+        if depth == 1:
+            # Full-window alphabeta nodes rarely cut off at the first move
+            prefetch_window(board, moves, index, first=0)
+        make_move(board, move)
+        score, _ = alphabeta(board, depth - 1, -beta, -alpha, not maximizing, ply + 1)
         score = -score
-        board.pop()
+        unmake_move(board)
         
         if maximizing:
             if score > best_score:
@@ -276,9 +573,10 @@ def alphabeta(board, depth, alpha, beta, maximizing):
                 best_move = move
                 if best_score > alpha:
                     alpha = best_score
-                    flag = "exact"
+                    flag = EXACT
                 if alpha >= beta:
-                    flag = "lowerbound"
+                    flag = LOWERBOUND
+                    move_orderer.record_cutoff(board, move, depth, ply)
                     break
         else:
             if score < best_score:
@@ -286,71 +584,385 @@ def alphabeta(board, depth, alpha, beta, maximizing):
                 best_move = move
                 if best_score < beta:
                     beta = best_score
-                    flag = "exact"
+                    flag = EXACT
                 if beta <= alpha:
-                    flag = "upperbound"
+                    flag = UPPERBOUND
+                    move_orderer.record_cutoff(board, move, depth, ply)
                     break
 
     # Store in transposition table
-    if len(transposition_table) >= MAX_TT_SIZE:
-        transposition_table.clear()
-        
-    transposition_table[key] = {
-        "score": best_score,
-        "best_move": best_move,
-        "depth": depth,
-        "flag": flag
-    }
+    transposition_table.store(key, score_to_table(best_score, ply), best_move, depth, flag)
     
     return best_score, best_move
 
 # -------------------------------
-# Move Selection with Resource Control
+# Principal Variation Search
 # -------------------------------
-def select_best_move(board, difficulty):
-    """Balanced move selection with aggression control"""
-    # Use opening book for first few moves
-    if board.fullmove_number < 6:
-        move = get_opening_move(board)
-        if move:
-            return move
+# Negamax PVS with scores from the side to move's point of view. The first
+# move of each node (the previous iteration's PV move, else the TT move)
+# gets a full window; the rest are tried with a null window and only
+# re-searched when they beat alpha. Selected with SEARCH_ALGORITHM = "pvs".
+SEARCH_ALGORITHM = "alphabeta"
+MATE_SCORE = 99999
+INFINITY = 1000000
+# Scores this close to MATE_SCORE are mates
+MATE_THRESHOLD = MATE_SCORE - 1000
+ASPIRATION_WINDOW = 50
+
+# Principal variation of the last completed iteration
+principal_variation = []
+
+# Selectivity, each switchable. None of it applies on the principal
+# variation or when the side to move is in check.
+#  - null move: give the opponent a free move at reduced depth; if we are
+#    still above beta the node fails high. Skipped with only king and
+#    pawns, where passing can be better than any move (zugzwang).
+#  - late move reductions: quiet moves late in the ordering are searched
+#    shallower and re-searched at full depth only if they beat alpha.
+#  - futility: at the last two plies, quiet moves are skipped when the
+#    static evaluation plus a margin cannot reach alpha.
+#  - razoring: at the last two plies, nodes whose static evaluation is
+#    far below alpha are settled by quiescence search.
+NULL_MOVE_PRUNING = True
+LATE_MOVE_REDUCTIONS = True
+FUTILITY_PRUNING = True
+RAZORING = True
+
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3
+FUTILITY_MARGINS = [0, 200, 500]
+RAZOR_MARGINS = [0, 300, 550]
+
+def score_to_table(score, ply):
+    """A score for the transposition table: mates counted from this node instead of the root"""
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+def score_from_table(score, ply):
+    """A transposition table score at ply: mates counted from the root again"""
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+def has_non_pawn_material(board, color):
+    """Whether color has a piece other than king and pawns"""
+    return bool(board.occupied_co[color] & (board.knights | board.bishops | board.rooks | board.queens))
+
+def is_futile(board, move):
+    """Whether futility pruning skips move: quiet and not giving check"""
+    return not move.promotion and not board.is_capture(move) and not board.gives_check(move)
+
+def pvs(board, depth, alpha, beta, ply=0, on_pv=True, allow_null=True):
+    """Principal variation search, returning (score, principal variation)"""
+    global node_count
+    node_count += 1
+    if node_count % TIME_CHECK_NODES == 0:
+        time_manager.check()
+    
+    if board.is_game_over():
+        if board.is_checkmate():
+            return -MATE_SCORE + ply, []  # Prefer the quickest mate
+        return 0, []
+    
+    original_alpha = alpha
+    key = position_key(board)
+    tt_move = None
+    tt_entry = transposition_table.probe(key)
+    if tt_entry is not None:
+        tt_score, tt_move, tt_depth, tt_flag = tt_entry
+        tt_score = score_from_table(tt_score, ply)
+        if tt_depth >= depth and ply > 0:
+            if tt_flag == EXACT:
+                if search_stats is not None:
+                    search_stats.tt_cutoffs += 1
+                return tt_score, [tt_move] if tt_move else []
+            elif tt_flag == LOWERBOUND:
+                alpha = max(alpha, tt_score)
+            elif tt_flag == UPPERBOUND:
+                beta = min(beta, tt_score)
+            if alpha >= beta:
+                if search_stats is not None:
+                    search_stats.tt_cutoffs += 1
+                return tt_score, []
+    
+    if depth <= 0:
+        return quiesce(board, alpha, beta, relative=True), []
     
-    # Difficulty settings - more aggressive at higher levels
-    time_limits = {"easy": 1.5, "medium": 3.0, "hard": 5.0}
-    depth_settings = {"easy": 2, "medium": 3, "hard": 4}
+    pv_node = beta - alpha > 1
+    in_check = board.is_check()
+    selective = not pv_node and not in_check and ply > 0
+    if selective and (NULL_MOVE_PRUNING or FUTILITY_PRUNING or RAZORING):
+        stand_pat = static_eval(board, relative=True)
     
-    start_time = time.time()
+    if selective and RAZORING and depth < len(RAZOR_MARGINS) and stand_pat + RAZOR_MARGINS[depth] <= alpha:
+        score = quiesce(board, alpha, alpha + 1, relative=True)
+        if score <= alpha:
+            return score, []
+    
+    if (selective and NULL_MOVE_PRUNING and allow_null and depth >= NULL_MOVE_MIN_DEPTH
+            and stand_pat >= beta and has_non_pawn_material(board, board.turn)):
+        make_move(board, chess.Move.null())
+        score, _ = pvs(board, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, ply + 1, False, False)
+        unmake_move(board)
+        if -score >= beta:
+            return beta, []  # Not -score: an unproven mate score must not be stored
+    
+    futile = (selective and FUTILITY_PRUNING and depth < len(FUTILITY_MARGINS)
+              and stand_pat + FUTILITY_MARGINS[depth] <= alpha)
+    
+    # Replay the previous iteration's line while we are still on it
+    on_pv = on_pv and ply < len(principal_variation)
+    hash_move = principal_variation[ply] if on_pv else tt_move
+    moves = move_orderer.moves(board, hash_move, ply)
+    if search_stats is not None:
+        moves = search_stats.timed_moves(moves)
+    if depth == 1:
+        moves = list(moves)
+    
+    best_score = -INFINITY
     best_move = None
-    depth = 1
+    best_line = []
+    for index, move in enumerate(moves):
+        if depth == 1 and index % PREFETCH_MOVES == 1:
+            window = moves[index:index + PREFETCH_MOVES]
+            if futile:
+                window = [candidate for candidate in window if not is_futile(board, candidate)]
+            prefetch_evaluations(board, window)
+        quiet = not move.promotion and not board.is_capture(move)
+        if futile and index > 0 and is_futile(board, move):
+            continue
+        child_on_pv = on_pv and move == hash_move
+        make_move(board, move)
+        if index == 0:
+            score, line = pvs(board, depth - 1, -beta, -alpha, ply + 1, child_on_pv)
+            score = -score
+        else:
+            reduction = 0
+            if (LATE_MOVE_REDUCTIONS and quiet and depth >= LMR_MIN_DEPTH and index >= LMR_FULL_DEPTH_MOVES
+                    and not in_check and not board.is_check()):
+                reduction = 1 if index < 2 * LMR_FULL_DEPTH_MOVES else 2
+            score, line = pvs(board, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1, False)
+            score = -score
+            if reduction and score > alpha:
+                score, line = pvs(board, depth - 1, -alpha - 1, -alpha, ply + 1, False)
+                score = -score
+            if alpha < score < beta:
+                score, line = pvs(board, depth - 1, -beta, -alpha, ply + 1, child_on_pv)
+                score = -score
+        unmake_move(board)
+        
+        if score > best_score:
+            best_score = score
+            best_move = move
+            best_line = [move] + line
+        if score > alpha:
+            alpha = score
+        if alpha >= beta:
+            move_orderer.record_cutoff(board, move, depth, ply)
+            break
     
-    # Clear transposition table periodically
-    global transposition_table
-    if len(transposition_table) > MAX_TT_SIZE * 0.9:
-        transposition_table.clear()
+    if best_score <= original_alpha:
+        flag = UPPERBOUND
+    elif best_score >= beta:
+        flag = LOWERBOUND
+    else:
+        flag = EXACT
+    transposition_table.store(key, score_to_table(best_score, ply), best_move, depth, flag)
     
-    # Use GPU warm-up
-    if device.type == 'cuda':
-        torch.cuda.empty_cache()
+    return best_score, best_line
+
+def aspiration_search(board, depth, previous_score):
+    """pvs at the root in a window around the previous iteration's score, widened on failure"""
+    if previous_score is None:
+        return pvs(board, depth, -INFINITY, INFINITY)
+    
+    window = ASPIRATION_WINDOW
+    alpha, beta = previous_score - window, previous_score + window
+    while True:
+        score, line = pvs(board, depth, alpha, beta)
+        if score <= alpha:
+            alpha = max(score - window, -INFINITY)
+        elif score >= beta:
+            beta = min(score + window, INFINITY)
+        else:
+            return score, line
+        window *= 2
+
+# -------------------------------
+# Move Selection with Resource Control
+# -------------------------------
+# Difficulty settings - more aggressive at higher levels
+TIME_LIMITS = {"easy": 1.5, "medium": 3.0, "hard": 5.0}
+DEPTH_SETTINGS = {"easy": 2, "medium": 3, "hard": 4}
+
+# Worker processes sharing the transposition table (1 = search in-process)
+SEARCH_WORKERS = 1
+
+# Search a native Position built from the board instead of pushing and
+# popping moves on the chess.Board itself
+NATIVE_POSITION = True
+
+def iterative_deepening(board, max_depth, time_limit, start_depth=1):
+    """Deepen until max_depth or time_limit, returning (best_move, score, completed depth)
+
+    time_limit is a hard budget: an iteration still running when it expires
+    is aborted and the result of the last completed iteration is returned.
+    """
+    global principal_variation
+    time_manager.start(time_limit)
+    if NATIVE_POSITION:
+        board = Position(board)
+        track_board(board)
+    root_ply = len(board.move_stack)
+    principal_variation = []
+    best_move = None
+    best_score = None
+    completed_depth = 0
+    depth = start_depth
+    if search_stats is not None:
+        search_stats.begin(stats_counters())
     
-    # Iterative deepening
-    while depth <= depth_settings[difficulty]:
-        maximizing = board.turn == chess.WHITE
-        score, current_move = alphabeta(board, depth, -99999, 99999, maximizing)
+    while depth <= max_depth and (completed_depth == 0 or time_manager.can_start_iteration()):
+        try:
+            if SEARCH_ALGORITHM == "pvs":
+                score, line = aspiration_search(board, depth, best_score)
+                current_move = line[0] if line else None
+                principal_variation = line
+            else:
+                maximizing = board.turn == chess.WHITE
+                score, current_move = alphabeta(board, depth, -99999, 99999, maximizing)
+        except SearchAborted:
+            # Unwind the moves the aborted iteration left on the board
+            while len(board.move_stack) > root_ply:
+                unmake_move(board)
+            break
         
         if current_move:
             best_move = current_move
-        
-        # Check time limit
-        elapsed = time.time() - start_time
-        if elapsed > time_limits[difficulty]:
-            break
-            
+            best_score = score
+        completed_depth = depth
+        if search_stats is not None:
+            search_stats.end_iteration(depth, score, current_move, stats_counters())
         depth += 1
     
+    if search_stats is not None:
+        # Include the work of an aborted last iteration in the totals
+        search_stats.update(stats_counters())
+    return best_move, best_score, completed_depth
+
+def stats_counters():
+    """Engine counters that SearchStats reports as differences (search_stats.COUNTERS order)"""
+    return (node_count, qsearch_nodes, transposition_table.probes, transposition_table.hits,
+            nn_cache.hits, nn_cache.misses)
+
+# Search algorithm whose scores the transposition table currently holds
+_table_algorithm = SEARCH_ALGORITHM
+
+def prepare_search(board):
+    """Reset per-search state before searching from board"""
+    # alphabeta and pvs store scores from different points of view
+    global _table_algorithm
+    if _table_algorithm != SEARCH_ALGORITHM:
+        transposition_table.clear()
+        _table_algorithm = SEARCH_ALGORITHM
+    
+    # Keep earlier searches' entries, but let this search replace them first
+    transposition_table.new_search()
+    move_orderer.new_search()
+    
+    track_board(board)
+    
+    # Use GPU warm-up
+    if device.type == 'cuda':
+        torch.cuda.empty_cache()
+
+def move_budget(difficulty, time_left=None, increment=0.0):
+    """Seconds to search: from the clock if known, capped by the difficulty's limit"""
+    time_limit = TIME_LIMITS[difficulty]
+    if time_left is not None:
+        time_limit = allocate_time(time_left, increment, max_time=time_limit)
+    return time_limit
+
+def select_best_move(board, difficulty, workers=None, time_left=None, increment=0.0, stats=None):
+    """Balanced move selection with aggression control
+
+    With time_left (seconds on the engine's clock) the move's budget is
+    allocated from the clock and increment, capped by the difficulty's
+    time limit. stats, a search_stats.SearchStats, is filled in with the
+    search's counters and timings (in-process searches only).
+    """
+    if stats is None:
+        return choose_move(board, difficulty, workers, time_left, increment)
+    
+    global search_stats
+    stats.reset()
+    search_stats = stats
+    profiler = cProfile.Profile() if stats.profile_path else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        return choose_move(board, difficulty, workers, time_left, increment)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(stats.profile_path)
+        search_stats = None
+
+def choose_move(board, difficulty, workers=None, time_left=None, increment=0.0):
+    """Opening book move, else the search's best move, else the first ordered move"""
+    # Use opening book for first few moves
+    if board.fullmove_number < 6:
+        move = get_opening_move(board)
+        if move:
+            return move
+    
+    time_limit = move_budget(difficulty, time_left, increment)
+    
+    workers = workers or SEARCH_WORKERS
+    if workers > 1:
+        # Lazy SMP across worker processes (imported here to avoid a cycle)
+        import smp
+        best_move, _, _, _ = smp.parallel_search(
+            board, DEPTH_SETTINGS[difficulty], time_limit, workers
+        )
+    else:
+        prepare_search(board)
+        best_move, _, _ = iterative_deepening(board, DEPTH_SETTINGS[difficulty], time_limit)
+    
     # Fallback to aggressive move if none found
     if best_move is None:
         legal_moves = order_moves(board)
         if legal_moves:
             return legal_moves[0]  # Most aggressive move
     
+    return best_move
+
+# -------------------------------
+# Pondering Support
+# -------------------------------
+def expected_reply(board):
+    """The opponent's reply the last search expects, from the transposition table"""
+    tt_entry = transposition_table.probe(position_key(board))
+    if tt_entry is not None and tt_entry[1] in board.legal_moves:
+        return tt_entry[1]
+    # No stored line: guess the best capture
+    legal_moves = order_moves(board)
+    return legal_moves[0] if legal_moves else None
+
+def ponder_search(board, difficulty):
+    """Search without a deadline until stopped, finished, or given one by time_manager.ponderhit"""
+    if board.fullmove_number < 6:
+        move = get_opening_move(board)
+        if move:
+            return move
+    
+    prepare_search(board)
+    best_move, _, _ = iterative_deepening(board, DEPTH_SETTINGS[difficulty], None)
     return best_move
\ No newline at end of file
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import chess
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+from board_encoding import piece_bitboards, extra_features, unpack_planes, game_phase
+from pgn_pipeline import iter_chunks
+
+# -------------------------------
+# Binary Position Dataset
+# -------------------------------
+# One fixed-size 99-byte record per position, after a 16-byte header:
+#   bitboards  12 x uint64  piece_bitboards order (white P N B R Q K, black P N B R Q K)
+#   flags      uint8        bits 0-4: extra_features (castling WK WQ BK BQ, White to move)
+#                           bits 5-6: game phase (0 opening, 1 middlegame, 2 endgame)
+#   score      int16        centipawns from White's point of view
+# The reader memory-maps the file, so opening even a 50M-position set
+# (about 5 GB) costs nothing up front; planes and extras are unpacked
+# with board_encoding only for the rows a batch asks for, exactly as
+# board_to_tensor encodes a board for the network.
+MAGIC = b"CHESSPOS"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+RECORD_DTYPE = np.dtype([("bitboards", "<u8", (12,)), ("flags", "u1"), ("score", "<i2")])
+
+PHASES = ("opening", "middlegame", "endgame")
+PHASE_SHIFT = 5
+
+# Scores are clipped to the labeler's mate score, well inside int16
+SCORE_LIMIT = 10000
+# Network targets are centipawns / SCORE_SCALE (finish_evaluation multiplies by it)
+SCORE_SCALE = 1000
+
+WRITE_BUFFER = 65536
+
+def pack_flags(board):
+    """Flags byte of a position: extra_features bits and the game phase"""
+    flags = 0
+    for bit, value in enumerate(extra_features(board)):
+        flags |= int(value) << bit
+    return flags | PHASES.index(game_phase(board)) << PHASE_SHIFT
+
+def unpack_extras(flags, out):
+    """(..., 5) extra_features from flags bytes, written to out"""
+    out[...] = np.unpackbits(np.asarray(flags, dtype=np.uint8)[..., None], axis=-1, bitorder="little")[..., :5]
+    return out
+
+def record_phases(flags):
+    """Game phase index (see PHASES) of each flags byte"""
+    return (np.asarray(flags) >> PHASE_SHIFT) & 3
+
+class DatasetWriter:
+    """Appends position records to a dataset file, creating it with a header if needed"""
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header[0] = (MAGIC, VERSION, RECORD_DTYPE.itemsize)
+            with open(path, "wb") as f:
+                header.tofile(f)
+        else:
+            read_header(path)
+        self.file = open(path, "ab")
+        self.buffer = np.zeros(WRITE_BUFFER, dtype=RECORD_DTYPE)
+        self.count = 0
+        self.written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, board, score):
+        """Append board with its centipawn score from White's point of view"""
+        record = self.buffer[self.count]
+        record["bitboards"] = piece_bitboards(board)
+        record["flags"] = pack_flags(board)
+        record["score"] = max(-SCORE_LIMIT, min(SCORE_LIMIT, int(round(score))))
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def add_records(self, records):
+        """Append already packed records (RECORD_DTYPE)"""
+        self.flush()
+        np.asarray(records, dtype=RECORD_DTYPE).tofile(self.file)
+        self.written += len(records)
+
+    def flush(self):
+        self.buffer[:self.count].tofile(self.file)
+        self.file.flush()
+        self.written += self.count
+        self.count = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+def read_header(path):
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header[0]["magic"] != MAGIC:
+        raise ValueError(f"{path} is not a position dataset")
+    if header[0]["version"] != VERSION or header[0]["record_size"] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} has format version {header[0]['version']}, expected {VERSION}")
+    return header[0]
+
+def open_records(path, mode="r"):
+    """The records of a dataset file as a memory-mapped structured array"""
+    read_header(path)
+    count = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode=mode, offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+def record_board(record):
+    """A chess.Board with the pieces, castling rights and side to move of a record"""
+    board = chess.Board(None)
+    bitboards = [int(mask) for mask in record["bitboards"]]
+    for channel, mask in enumerate(bitboards):
+        color = chess.WHITE if channel < 6 else chess.BLACK
+        for square in chess.scan_forward(mask):
+            board.set_piece_at(square, chess.Piece(channel % 6 + 1, color))
+    flags = int(record["flags"])
+    rights = [chess.BB_H1, chess.BB_A1, chess.BB_H8, chess.BB_A8]
+    board.castling_rights = sum(mask for bit, mask in enumerate(rights) if flags >> bit & 1)
+    board.turn = bool(flags >> 4 & 1)
+    return board
+
+class PositionDataset(Dataset):
+    """ChessEvaluator inputs and targets from a memory-mapped dataset file
+
+    Items are (planes float32 12x8x8, extras float32 5, target float32),
+    the target being the score in centipawns / SCORE_SCALE. The file is
+    opened lazily in each DataLoader worker, and batches are unpacked
+    with one vectorized call through __getitems__.
+    """
+
+    def __init__(self, path, indices=None):
+        self.path = path
+        self.indices = indices
+        self.records = None
+        self.length = len(indices) if indices is not None else len(open_records(path))
+
+    def __len__(self):
+        return self.length
+
+    def _rows(self, items):
+        if self.records is None:
+            self.records = open_records(self.path)
+        rows = np.asarray(items)
+        if self.indices is not None:
+            rows = self.indices[rows]
+        # Sorted reads touch the file sequentially; the batch keeps the requested order
+        order = np.argsort(rows, kind="stable")
+        batch = np.empty(len(rows), dtype=RECORD_DTYPE)
+        batch[order] = self.records[rows[order]]
+        return batch
+
+    def unpack(self, batch):
+        """Planes, extras and targets of a batch of records"""
+        planes = np.empty((len(batch), 12, 8, 8), dtype=np.float32)
+        unpack_planes(batch["bitboards"], planes)
+        extras = unpack_extras(batch["flags"], np.empty((len(batch), 5), dtype=np.float32))
+        targets = batch["score"].astype(np.float32) / SCORE_SCALE
+        return planes, extras, targets
+
+    def __getitem__(self, item):
+        planes, extras, targets = self.unpack(self._rows([item]))
+        return torch.from_numpy(planes[0]), torch.from_numpy(extras[0]), torch.tensor(targets[0])
+
+    def __getitems__(self, items):
+        planes, extras, targets = self.unpack(self._rows(items))
+        return [(torch.from_numpy(planes[i]), torch.from_numpy(extras[i]), torch.tensor(targets[i]))
+                for i in range(len(items))]
+
+# -------------------------------
+# Conversion
+# -------------------------------
+def convert_chunks(chunk_dir, path):
+    """Append the labeled positions of a pgn_pipeline run (after labeler.py) to a dataset file"""
+    skipped = 0
+    with DatasetWriter(path) as writer:
+        for chunk in iter_chunks(chunk_dir):
+            labels = chunk["labels"]
+            # Chunk labels are tanh(centipawns / 1000)
+            scores = np.arctanh(np.clip(labels, -0.999999, 0.999999)) * 1000
+            for fen, label, score in zip(chunk["fens"], labels, scores):
+                if np.isnan(label):
+                    skipped += 1
+                    continue
+                writer.add(chess.Board(fen.decode()), score)
+    return {"written": writer.written, "skipped_unlabeled": skipped}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a binary position dataset from labeled pgn_pipeline chunks")
+    parser.add_argument("chunk_dir", help="pgn_pipeline output directory, labeled with labeler.py")
+    parser.add_argument("output", help="dataset file to create or append to")
+    args = parser.parse_args()
+    print(json.dumps(convert_chunks(args.chunk_dir, args.output)))
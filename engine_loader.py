@@ -0,0 +1,48 @@
+import threading
+
+# -------------------------------
+# Background Engine Loading
+# -------------------------------
+# computer_player imports torch and the network weights, which takes
+# seconds. The GUI never imports it directly: preload() starts the import
+# on a background thread as soon as a computer opponent is chosen, so the
+# screens stay responsive, and games against a human never load it.
+_thread = None
+_engine = None
+_ponder = None
+_error = None
+
+def _load():
+    global _engine, _ponder, _error
+    try:
+        import computer_player
+        import ponder
+        computer_player.load_model()
+        _ponder = ponder
+        _engine = computer_player
+    except Exception as e:
+        _error = e
+
+def preload():
+    """Start loading the engine in the background (does nothing if already started)"""
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_load, daemon=True)
+        _thread.start()
+
+def ready():
+    """Whether the engine has finished loading"""
+    return _engine is not None
+
+def engine():
+    """The computer_player module, waiting for the background load if needed"""
+    preload()
+    _thread.join()
+    if _error is not None:
+        raise _error
+    return _engine
+
+def ponderer(difficulty):
+    """A ponder.Ponderer for difficulty, waiting for the background load if needed"""
+    engine()
+    return _ponder.Ponderer(difficulty)
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+
+# -------------------------------
+# Evaluation Cache
+# -------------------------------
+# Approximate memory held by one entry: the OrderedDict slot and link node
+# plus a 64-bit int key and a float value.
+ENTRY_BYTES = 160
+
+class EvalCache:
+    """LRU cache of position evaluations bounded by a byte budget
+
+    Keys are 64-bit Zobrist hashes. When the budget is reached the least
+    recently used entries are evicted one at a time instead of dropping
+    the whole cache.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.capacity = max(1, max_bytes // ENTRY_BYTES)
+        self.entries = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        # Membership test only: no recency update and no hit/miss counting
+        return key in self.entries
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        entries = self.entries
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.reset_stats()
+
+    def stats(self):
+        lookups = max(self.hits + self.misses, 1)
+        return {
+            "max_bytes": self.max_bytes,
+            "entries": len(self.entries),
+            "bytes": len(self.entries) * ENTRY_BYTES,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups
+        }
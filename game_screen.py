@@ -1,6 +1,5 @@
 import pygame
 import chess
-import time as pytime
 import threading
 import tkinter as tk
 from tkinter import filedialog
@@ -13,7 +12,7 @@ from config import (
 )
 from draw_board import draw_game_board, draw_bottombar, draw_time_sidebar, draw_move_log, draw_topbar, draw_sidebar_gameboards
 from chess_pieces import load_images, draw_pieces, highlight_squares
-from computer_player import select_best_move
+import engine_loader
 
 # Load resources
 sounds = load_sounds()
@@ -29,6 +28,9 @@ pygame.init()
 win = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Chess Game")
 
+# Search the expected reply while the human is thinking
+PONDER = True
+
 def ask_save_move_logs(move_log):
     root = tk.Tk(); root.withdraw()
     file_path = filedialog.asksaveasfilename(
@@ -58,8 +60,11 @@ def main(selected_opponent, difficulty=None):
     ai_thread = None
     ai_move = None
     ai_thinking = False
-    ai_start_time = 0.0
     pre_board = board.copy()
+    # The engine loads in the background; the ponderer is created with the first AI move
+    ponderer = None
+    if selected_opponent == "computer":
+        engine_loader.preload()
 
     while True:
         dt = clock.tick(60) / 1000.0
@@ -71,8 +76,6 @@ def main(selected_opponent, difficulty=None):
 
         if ai_thinking and ai_thread and not ai_thread.is_alive():
             ai_thinking = False
-            elapsed = pytime.time() - ai_start_time
-            black_time -= elapsed
 
             if ai_move and ai_move in board.legal_moves:
                 san = board.san(ai_move)
@@ -91,8 +94,13 @@ def main(selected_opponent, difficulty=None):
                 play_sound('check', sounds)
             ai_thread = None
 
+            if PONDER and ponderer is not None and not board.is_game_over():
+                ponderer.start(board)
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if ponderer is not None:
+                    ponderer.stop()
                 return "end"
             
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -100,9 +108,13 @@ def main(selected_opponent, difficulty=None):
                 buttons = draw_topbar(win)
 
                 if buttons["Restart"].collidepoint(x,y):
+                    if ponderer is not None:
+                        ponderer.stop()
                     play_sound('click', sounds); return "restart"
                 
                 if buttons["End"].collidepoint(x,y):
+                    if ponderer is not None:
+                        ponderer.stop()
                     ask_save_move_logs(move_log)
                     play_sound('click', sounds)
                     return "end"
@@ -168,15 +180,25 @@ def main(selected_opponent, difficulty=None):
                     else:
                         message = "White to move" if board.turn==chess.WHITE else "Black to move"
 
+                    if game_over:
+                        if ponderer is not None:
+                            ponderer.stop()
+
                     if (selected_opponent=="computer" and board.turn==chess.BLACK and not board.is_game_over() and not ai_thinking):
                         pre_board = board.copy()
                         ai_move = None
                         ai_thinking = True
-                        ai_start_time = pytime.time()
 
-                        def ai_worker():
-                            nonlocal ai_move
-                            ai_move = select_best_move(board.copy(), difficulty)
+                        # The search gets its own copy, taken here before the GUI thread moves on
+                        def ai_worker(human_move=move, search_board=board.copy()):
+                            nonlocal ai_move, ponderer
+                            engine = engine_loader.engine()  # Waits only if still loading
+                            if ponderer is None:
+                                ponderer = engine_loader.ponderer(difficulty)
+                            # A ponder hit returns almost at once, a miss falls back to a normal search
+                            ai_move = ponderer.finish(human_move, black_time)
+                            if ai_move is None:
+                                ai_move = engine.select_best_move(search_board, difficulty, time_left=black_time)
                         ai_thread = threading.Thread(target=ai_worker, daemon=True)
                         ai_thread.start()
 
@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import queue
+import time
+import chess
+import chess.engine
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from eval_cache import EvalCache
+from pgn_pipeline import CHECKPOINT
+from zobrist import zobrist_hash
+
+# -------------------------------
+# Engine Labeling
+# -------------------------------
+# Scores positions with a pool of long-lived UCI engine processes, one per
+# core by default, each used by one thread at a time. Engines are started
+# once, not per position; identical positions (by Zobrist key) are
+# analysed once. A position the engine fails on gets a material score and
+# is flagged as a fallback label; a crashed engine is restarted.
+ENGINE_COMMAND = "stockfish"
+DEFAULT_LIMIT = chess.engine.Limit(time=0.1)
+MATE_SCORE = 10000
+
+# Labels kept for deduplication across chunks, bounded like the eval cache
+LABEL_CACHE_MB = 64
+
+# Fallback material values in centipawns
+MATERIAL_VALUES = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 300, chess.ROOK: 500, chess.QUEEN: 900}
+
+def material_score(board):
+    """Material balance in centipawns from White's point of view"""
+    return sum(
+        value * (chess.popcount(board.pieces_mask(piece_type, chess.WHITE))
+                 - chess.popcount(board.pieces_mask(piece_type, chess.BLACK)))
+        for piece_type, value in MATERIAL_VALUES.items()
+    )
+
+class EnginePool:
+    """Long-lived UCI engine processes analysing positions concurrently
+
+    options are UCI options set on every engine (Threads defaults to 1 so
+    that one engine per core does not oversubscribe the machine).
+    """
+
+    def __init__(self, command=ENGINE_COMMAND, processes=None, options=None):
+        self.command = command
+        self.options = {"Threads": 1}
+        self.options.update(options or {})
+        processes = processes or os.cpu_count() or 1
+        self.engines = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=processes)
+        self.restarts = 0
+        try:
+            for _ in range(processes):
+                self.engines.put(self._start_engine())
+        except Exception:
+            self.close()
+            raise
+
+    def _start_engine(self):
+        engine = chess.engine.SimpleEngine.popen_uci(self.command)
+        engine.configure({name: value for name, value in self.options.items() if name in engine.options})
+        return engine
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+        while not self.engines.empty():
+            engine = self.engines.get()
+            try:
+                engine.quit()
+            except (chess.engine.EngineError, chess.engine.EngineTerminatedError, TimeoutError):
+                engine.close()
+
+    def analyse(self, board, limit=DEFAULT_LIMIT):
+        """(score in centipawns from White's point of view, whether it is a fallback) of board"""
+        engine = self.engines.get()
+        try:
+            info = engine.analyse(board, limit)
+            score = info["score"].white().score(mate_score=MATE_SCORE)
+            if score is None:
+                raise chess.engine.EngineError("analysis returned no score")
+            return score, False
+        except chess.engine.EngineTerminatedError:
+            # Replace the crashed process; if that fails too, the next analyse on it falls back again
+            engine.close()
+            try:
+                engine = self._start_engine()
+                self.restarts += 1
+            except (OSError, chess.engine.EngineError):
+                pass
+            return material_score(board), True
+        except (chess.engine.EngineError, TimeoutError, KeyError):
+            return material_score(board), True
+        finally:
+            self.engines.put(engine)
+
+    def label(self, boards, keys=None, limit=DEFAULT_LIMIT, cache=None):
+        """Scores and fallback flags of boards, analysing each distinct position once
+
+        keys are the boards' Zobrist hashes (computed if not given); cache
+        is an EvalCache of (score, fallback) kept across calls.
+        """
+        if keys is None:
+            keys = [zobrist_hash(board) for board in boards]
+        results = {}
+        futures = {}
+        for board, key in zip(boards, keys):
+            key = int(key)
+            if key in results or key in futures:
+                continue
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                results[key] = cached
+            else:
+                futures[key] = self.executor.submit(self.analyse, board, limit)
+
+        for key, future in futures.items():
+            results[key] = future.result()
+            if cache is not None:
+                cache.put(key, results[key])
+        scores = np.empty(len(keys), dtype=np.float32)
+        fallback = np.empty(len(keys), dtype=bool)
+        for index, key in enumerate(keys):
+            scores[index], fallback[index] = results[int(key)]
+        return scores, fallback
+
+def label_boards(boards, command=ENGINE_COMMAND, processes=None, limit=DEFAULT_LIMIT):
+    """Scores and fallback flags of boards, all from material if the engine cannot be started"""
+    try:
+        pool = EnginePool(command, processes)
+    except (FileNotFoundError, PermissionError, chess.engine.EngineError) as e:
+        print(f"Cannot start {command} ({e}); labeling by material")
+        return (np.array([material_score(board) for board in boards], dtype=np.float32),
+                np.ones(len(boards), dtype=bool))
+    with pool:
+        return pool.label(boards, limit=limit)
+
+# -------------------------------
+# Labeling pgn_pipeline Output
+# -------------------------------
+def label_chunks(out_dir, command=ENGINE_COMMAND, processes=None, limit=DEFAULT_LIMIT):
+    """Fill in the labels of a pgn_pipeline run, chunk by chunk
+
+    Labels are tanh(centipawns / 1000) as in train_model, and each chunk
+    gains a boolean fallback array. Chunks that already have one are
+    skipped, so an interrupted run can be started again.
+    """
+    with open(os.path.join(out_dir, CHECKPOINT)) as f:
+        names = [name for entry in json.load(f)["shards"] for name in entry["files"]]
+    cache = EvalCache(LABEL_CACHE_MB * 1024 * 1024)
+    labeled = fallbacks = 0
+    start_time = time.perf_counter()
+    with EnginePool(command, processes) as pool:
+        for done, name in enumerate(names, 1):
+            path = os.path.join(out_dir, name)
+            with np.load(path) as chunk:
+                arrays = {key: chunk[key] for key in chunk.files}
+            if "fallback" in arrays:
+                continue
+            boards = [chess.Board(fen.decode()) for fen in arrays["fens"]]
+            scores, fallback = pool.label(boards, arrays["keys"], limit, cache)
+            arrays["labels"] = np.tanh(scores / 1000).astype(np.float32)
+            arrays["fallback"] = fallback
+
+            temp_path = path + ".tmp"
+            with open(temp_path, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, path)
+            labeled += len(boards)
+            fallbacks += int(fallback.sum())
+            rate = labeled / (time.perf_counter() - start_time)
+            print(f"  {done}/{len(names)} chunks, {labeled} positions ({rate:.0f}/s), "
+                  f"{fallbacks} fallback labels, {pool.restarts} engine restarts")
+    return {"labeled": labeled, "fallback": fallbacks, "cache": cache.stats()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Label pgn_pipeline chunks with a UCI engine")
+    parser.add_argument("out_dir", help="pgn_pipeline output directory")
+    parser.add_argument("--engine", default=ENGINE_COMMAND, help="UCI engine command")
+    parser.add_argument("--processes", type=int, help="engine processes (default: CPU count)")
+    parser.add_argument("--time", type=float, help="seconds per position")
+    parser.add_argument("--depth", type=int, help="depth per position")
+    parser.add_argument("--nodes", type=int, help="nodes per position")
+    args = parser.parse_args()
+    if args.time is None and args.depth is None and args.nodes is None:
+        limit = DEFAULT_LIMIT
+    else:
+        limit = chess.engine.Limit(time=args.time, depth=args.depth, nodes=args.nodes)
+    summary = label_chunks(args.out_dir, args.engine, args.processes, limit)
+    print(f"Done: {summary['labeled']} positions labeled, {summary['fallback']} from material")
@@ -8,6 +8,7 @@ from welcome_screen import (
 from choose_opponent import draw_choose_opponent, handle_choice_events
 from difficulty_selection import draw_difficulty_selection, choose_difficulty
 from game_screen import main as run_game_screen
+import engine_loader
 
 pygame.init()
 win = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -49,6 +50,8 @@ while running:
                     current_screen = GAME
                 else:  # computer
                     sound.play_sound('click', sounds)
+                    # Load the engine while the difficulty is being chosen
+                    engine_loader.preload()
                     current_screen = DIFFICULTY
 
             elif action == "welcome":
@@ -0,0 +1,247 @@
+import argparse
+import ast
+import math
+import multiprocessing
+import os
+import random
+import time
+import chess
+import chess.pgn
+import torch
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import computer_player
+from eval_cache import EvalCache
+from move_ordering import MoveOrderer
+from search_stats import SearchStats
+from transposition import TranspositionTable
+
+# -------------------------------
+# Engine-vs-Engine Matches
+# -------------------------------
+# Plays two select_best_move configurations against each other without the
+# GUI, e.g.
+#   python match_runner.py --engine name=pvs,SEARCH_ALGORITHM=pvs \
+#                          --engine name=alphabeta --games 40 --workers 4
+# Each opening from the PGN is played twice with colours reversed. Games
+# run in parallel worker processes; within a game both sides share the
+# process but each keeps its own transposition table, killers/history and
+# evaluation cache, swapped in before its moves.
+OPENING_PLIES = 10  # Past the opening book, which only covers the first moves
+MAX_GAME_PLIES = 300  # Adjudicated as a draw beyond this
+
+# Keys of an engine spec that are not computer_player settings
+SPEC_KEYS = ("name", "difficulty", "evaluator", "weights")
+
+def parse_engine(spec):
+    """Engine configuration from "name=x,difficulty=easy,evaluator=nnue,SEARCH_ALGORITHM=pvs,..."."""
+    config = {"name": None, "difficulty": "medium", "evaluator": "cnn",
+              "weights": computer_player.ACCUMULATOR_WEIGHTS, "settings": {}}
+    for item in filter(None, spec.split(",")):
+        key, _, value = item.partition("=")
+        if key in SPEC_KEYS:
+            config[key] = value
+            continue
+        if not key.isupper() or not hasattr(computer_player, key):
+            raise ValueError(f"Unknown engine setting: {key}")
+        try:
+            config["settings"][key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            config["settings"][key] = value
+    if config["difficulty"] not in computer_player.DEPTH_SETTINGS:
+        raise ValueError(f"Unknown difficulty: {config['difficulty']}")
+    config["name"] = config["name"] or spec or "default"
+    return config
+
+def load_openings(pgn_path="sample_1000.pgn", count=20, plies=OPENING_PLIES, seed=0):
+    """Opening lines: the first plies moves of games drawn at random from pgn_path"""
+    lines = []
+    with open(pgn_path) as f:
+        while True:
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            moves = list(game.mainline_moves())[:plies]
+            board = game.board()
+            for move in moves:
+                board.push(move)
+            if len(moves) == plies and not board.is_game_over():
+                lines.append(moves)
+    random.Random(seed).shuffle(lines)
+    return lines[:count]
+
+# -------------------------------
+# Worker Side
+# -------------------------------
+class EngineSide:
+    """One configuration's search state inside a worker process
+
+    overridden names every setting either side of the game overrides;
+    activate() resets them to their defaults before applying this side's
+    own, so that the opponent's overrides never carry over.
+    """
+
+    def __init__(self, config, overridden=()):
+        self.config = config
+        self.overridden = overridden
+        self.transposition_table = TranspositionTable(computer_player.TT_SIZE_MB)
+        self.move_orderer = MoveOrderer()
+        self.nn_cache = EvalCache(computer_player.EVAL_CACHE_MB * 1024 * 1024)
+        computer_player.set_evaluator(config["evaluator"], config["weights"])
+        self.accumulator = computer_player.accumulator
+        self.nodes = 0
+        self.search_time = 0.0
+
+    def activate(self):
+        """Install this side's settings and tables in computer_player"""
+        computer_player.EVALUATOR = self.config["evaluator"]
+        computer_player.accumulator = self.accumulator
+        computer_player.accumulator_weights = self.config["weights"] if self.accumulator else None
+        computer_player.transposition_table = self.transposition_table
+        computer_player.move_orderer = self.move_orderer
+        computer_player.nn_cache = self.nn_cache
+        for name in self.overridden:
+            setattr(computer_player, name, _defaults[name])
+        for name, value in self.config["settings"].items():
+            setattr(computer_player, name, value)
+        # Scores in this side's table are from its own algorithm
+        computer_player._table_algorithm = computer_player.SEARCH_ALGORITHM
+
+    def play(self, board):
+        self.activate()
+        stats = SearchStats()
+        move = computer_player.select_best_move(board.copy(), self.config["difficulty"], workers=1, stats=stats)
+        self.nodes += stats.nodes
+        self.search_time += stats.elapsed
+        return move
+
+_defaults = None
+
+def _init_worker():
+    global _defaults
+    torch.set_num_threads(1)
+    # Settings an engine spec may override, restored before every game
+    _defaults = {name: getattr(computer_player, name) for name in dir(computer_player) if name.isupper()}
+
+def play_game(opening, white_config, black_config, max_plies=MAX_GAME_PLIES):
+    """Play one game from opening; returns (PGN text, result, white's and black's (nodes, seconds))"""
+    for name, value in _defaults.items():
+        setattr(computer_player, name, value)
+    overridden = set(white_config["settings"]) | set(black_config["settings"])
+    sides = {chess.WHITE: EngineSide(white_config, overridden),
+             chess.BLACK: EngineSide(black_config, overridden)}
+
+    board = chess.Board()
+    for move in opening:
+        board.push(move)
+    while not board.is_game_over(claim_draw=True) and len(board.move_stack) < max_plies:
+        move = sides[board.turn].play(board)
+        if move is None or move not in board.legal_moves:
+            break  # Forfeit: no legal move returned
+        board.push(move)
+
+    if board.is_game_over(claim_draw=True):
+        result = board.result(claim_draw=True)
+    elif len(board.move_stack) >= max_plies:
+        result = "1/2-1/2"
+    else:
+        result = "0-1" if board.turn == chess.WHITE else "1-0"
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "Engine match"
+    game.headers["White"] = white_config["name"]
+    game.headers["Black"] = black_config["name"]
+    game.headers["Result"] = result
+    game.headers["Opening"] = " ".join(move.uci() for move in opening)
+    return (str(game), result,
+            (sides[chess.WHITE].nodes, sides[chess.WHITE].search_time),
+            (sides[chess.BLACK].nodes, sides[chess.BLACK].search_time))
+
+# -------------------------------
+# Match Control
+# -------------------------------
+def elo_difference(wins, draws, losses):
+    """Elo difference with its 95% error margin, from the first player's results"""
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, float("inf")
+    score = (wins + 0.5 * draws) / games
+    # Per-game variance of the score around its mean
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+
+    def elo(p):
+        p = min(max(p, 1e-6), 1 - 1e-6)
+        return -400 * math.log10(1 / p - 1) + 0.0  # No "-0.0" for an even score
+
+    return elo(score), (elo(score + margin) - elo(score - margin)) / 2
+
+def run_match(engine_a, engine_b, openings, workers=None, output=None, max_plies=MAX_GAME_PLIES):
+    """Play every opening twice with colours reversed; returns the match summary"""
+    workers = workers or os.cpu_count() or 1
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    games = []
+    for opening in openings:
+        games.append((opening, engine_a, engine_b))
+        games.append((opening, engine_b, engine_a))
+
+    wins = draws = losses = 0
+    search = {engine_a["name"]: [0, 0.0], engine_b["name"]: [0, 0.0]}
+    pgn_file = open(output, "w") if output else None
+    start_time = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            futures = {pool.submit(play_game, opening, white, black, max_plies): (white, black)
+                       for opening, white, black in games}
+            for done, future in enumerate(as_completed(futures), 1):
+                pgn, result, white_search, black_search = future.result()
+                white, black = futures[future]
+                for config, (nodes, seconds) in ((white, white_search), (black, black_search)):
+                    search[config["name"]][0] += nodes
+                    search[config["name"]][1] += seconds
+                if result == "1/2-1/2":
+                    draws += 1
+                elif (result == "1-0") == (white is engine_a):
+                    wins += 1
+                else:
+                    losses += 1
+                if pgn_file:
+                    pgn_file.write(pgn + "\n\n")
+                    pgn_file.flush()
+                print(f"  game {done}/{len(games)}: {white['name']} - {black['name']} {result}"
+                      f"   (+{wins} ={draws} -{losses})")
+    finally:
+        if pgn_file:
+            pgn_file.close()
+
+    elo, margin = elo_difference(wins, draws, losses)
+    nps = {name: nodes / seconds if seconds else 0.0 for name, (nodes, seconds) in search.items()}
+    print(f"\n{engine_a['name']} vs {engine_b['name']}: +{wins} ={draws} -{losses} "
+          f"in {time.perf_counter() - start_time:.0f}s")
+    print(f"  Elo difference: {elo:+.1f} +/- {margin:.1f} (95%)")
+    for name, value in nps.items():
+        print(f"  {name}: {value:.0f} nodes/s")
+    return {"wins": wins, "draws": draws, "losses": losses, "elo": elo, "margin": margin, "nps": nps}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless engine-vs-engine match")
+    parser.add_argument("--engine", action="append", required=True,
+                        help="engine spec, e.g. name=pvs,difficulty=easy,evaluator=nnue,SEARCH_ALGORITHM=pvs "
+                             "(give two; a single one plays itself)")
+    parser.add_argument("--pgn", default="sample_1000.pgn", help="games to take the opening lines from")
+    parser.add_argument("--games", type=int, default=20, help="number of openings (each played twice)")
+    parser.add_argument("--plies", type=int, default=OPENING_PLIES, help="opening length in plies")
+    parser.add_argument("--workers", type=int, help="parallel games (default: CPU count)")
+    parser.add_argument("--output", default="match.pgn", help="PGN file to write the games to")
+    parser.add_argument("--seed", type=int, default=0, help="seed for drawing the openings")
+    args = parser.parse_args()
+    if len(args.engine) > 2:
+        parser.error("at most two engines")
+
+    engines = [parse_engine(spec) for spec in args.engine]
+    if len(engines) == 1:
+        engines.append(dict(engines[0], name=engines[0]["name"] + "'"))
+    elif engines[0]["name"] == engines[1]["name"]:
+        engines[1]["name"] += "'"
+    openings = load_openings(args.pgn, args.games, args.plies, args.seed)
+    run_match(engines[0], engines[1], openings, args.workers, args.output)
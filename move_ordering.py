@@ -0,0 +1,165 @@
+import chess
+
+# -------------------------------
+# Move Ordering
+# -------------------------------
+# Moves are generated in stages, each only when the search asks for the
+# next move, so a beta cutoff on the hash move or a capture skips
+# generating and sorting the quiet moves altogether:
+#   1. hash move (PV or transposition table move)
+#   2. captures and promotions, by MVV-LVA
+#   3. the two killer moves of this ply
+#   4. remaining quiet moves, by butterfly history
+MAX_PLY = 128
+
+# Ordering values indexed by piece type (index 0 unused)
+ORDER_VALUES = [0, 100, 320, 330, 500, 900, 20000]
+
+# MVV_LVA[victim][attacker]: most valuable victim first, cheapest attacker on ties
+MVV_LVA = [[10 * ORDER_VALUES[victim] - ORDER_VALUES[attacker] for attacker in range(7)]
+           for victim in range(7)]
+
+# Pawns one step from promotion, indexed by color
+PROMOTION_RANKS = [chess.BB_RANK_2, chess.BB_RANK_7]
+
+def capture_score(board, move):
+    """MVV-LVA score of a capture or promotion, from the board's piece bitboards"""
+    victim = board.piece_type_at(move.to_square)
+    if victim is None:
+        # Empty target square: a quiet promotion or an en passant capture
+        victim = 0 if move.promotion else chess.PAWN
+    score = MVV_LVA[victim][board.piece_type_at(move.from_square)]
+    if move.promotion:
+        score += ORDER_VALUES[move.promotion]
+    return score
+
+def static_exchange(board, move):
+    """Static exchange evaluation: material won by move once all recaptures on its square are played out
+
+    Each side recaptures with its least valuable attacker and may stop
+    whenever continuing would lose material; x-ray attackers behind the
+    pieces that have already captured join in.
+    """
+    to_square = move.to_square
+    occupied = board.occupied & ~chess.BB_SQUARES[move.from_square]
+    victim = board.piece_type_at(to_square)
+    if victim is None:
+        # En passant removes the pawn behind the target square
+        victim = chess.PAWN if board.is_en_passant(move) else 0
+        if victim:
+            occupied &= ~chess.BB_SQUARES[board.ep_square + (-8 if board.turn == chess.WHITE else 8)]
+    gains = [ORDER_VALUES[victim]]
+    attacker = board.piece_type_at(move.from_square)
+    if move.promotion:
+        gains[0] += ORDER_VALUES[move.promotion] - ORDER_VALUES[chess.PAWN]
+        attacker = move.promotion
+
+    side = not board.turn
+    while True:
+        attackers = board.attackers_mask(side, to_square, occupied) & occupied
+        if not attackers:
+            break
+        for piece_type in range(chess.PAWN, chess.KING + 1):
+            candidates = attackers & board.pieces_mask(piece_type, side)
+            if candidates:
+                break
+        square_mask = candidates & -candidates
+        if piece_type == chess.KING and board.attackers_mask(not side, to_square, occupied & ~square_mask) & occupied:
+            break  # The king cannot recapture into a defended square
+        gains.append(ORDER_VALUES[attacker] - gains[-1])
+        attacker = piece_type
+        occupied &= ~square_mask
+        side = not side
+
+    # Either side can decline to continue the exchange
+    for index in range(len(gains) - 1, 0, -1):
+        gains[index - 1] = -max(-gains[index - 1], gains[index])
+    return gains[0]
+
+def is_generated(board, move):
+    """Whether move is legal in the notation the move generator produces
+
+    board.is_legal also accepts castling written as king-takes-rook, which a
+    rook move stored as a killer or hash move can look like; the generator
+    writes castling with the king's destination square, so such a move would
+    be searched twice.
+    """
+    if board.is_castling(move):
+        return move in board.generate_castling_moves()
+    return board.is_legal(move)
+
+class MoveOrderer:
+    """Staged legal move generator with killer moves and a history table
+
+    Killer moves are quiet moves that caused a beta cutoff at the same ply
+    of the current search. The butterfly history scores quiet moves by
+    side, from-square and to-square with the cutoffs they produced
+    anywhere in the tree, and is halved between searches rather than reset.
+    """
+
+    def __init__(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [[0] * 4096, [0] * 4096]
+
+    def clear(self):
+        for slots in self.killers:
+            slots[0] = slots[1] = None
+        for table in self.history:
+            table[:] = [0] * 4096
+
+    def new_search(self):
+        """Forget the killers and age the history before a new search"""
+        for slots in self.killers:
+            slots[0] = slots[1] = None
+        for table in self.history:
+            table[:] = [value >> 1 for value in table]
+
+    def moves(self, board, hash_move=None, ply=0):
+        """Legal moves of board, most promising first, generated lazily
+
+        board must be back in the same position each time the next move
+        is requested (the search unmakes each move before continuing).
+        """
+        if hash_move is not None and is_generated(board, hash_move):
+            yield hash_move
+        else:
+            hash_move = None
+
+        turn = board.turn
+        promoting = board.pawns & board.occupied_co[turn] & PROMOTION_RANKS[turn]
+        tactical = list(board.generate_legal_captures())
+        if promoting:
+            tactical.extend(board.generate_legal_moves(promoting, ~board.occupied & chess.BB_ALL))
+        tactical.sort(key=lambda move: capture_score(board, move), reverse=True)
+        for move in tactical:
+            if move != hash_move:
+                yield move
+
+        searched = [hash_move]
+        if ply < MAX_PLY:
+            for killer in self.killers[ply]:
+                if (killer is not None and killer not in searched and not board.is_capture(killer)
+                        and not killer.promotion and is_generated(board, killer)):
+                    searched.append(killer)
+                    yield killer
+
+        history = self.history[turn]
+        ep_square = board.ep_square
+        quiets = [
+            move for move in board.generate_legal_moves(~promoting & chess.BB_ALL,
+                                                        ~board.occupied_co[not turn] & chess.BB_ALL)
+            if move not in searched and not (move.to_square == ep_square and board.is_en_passant(move))
+        ]
+        quiets.sort(key=lambda move: history[move.from_square << 6 | move.to_square], reverse=True)
+        yield from quiets
+
+    def record_cutoff(self, board, move, depth, ply):
+        """Reward a move that caused a beta cutoff (board is the position before the move)"""
+        if board.is_capture(move) or move.promotion:
+            return
+        if ply < MAX_PLY:
+            slots = self.killers[ply]
+            if slots[0] != move:
+                slots[1] = slots[0]
+                slots[0] = move
+        self.history[board.turn][move.from_square << 6 | move.to_square] += depth * depth
\ No newline at end of file
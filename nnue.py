@@ -0,0 +1,109 @@
+import chess
+import torch
+import numpy as np
+from torch import nn
+from board_encoding import piece_bitboards, extra_features, unpack_features, piece_changes
+
+# -------------------------------
+# Accumulator Model Definition
+# -------------------------------
+# NNUE-style evaluator: the first layer is linear in 768 one-hot
+# (piece, square) features, so its output (the accumulator) can be updated
+# by adding and subtracting weight columns as pieces move instead of being
+# recomputed for every position.
+NUM_FEATURES = 12 * 64
+HIDDEN_SIZE = 256
+
+def feature_index(color, piece_type, square):
+    """Input feature of a piece on a square, in board_encoding channel order"""
+    channel = piece_type - 1 + (0 if color == chess.WHITE else 6)
+    return channel * 64 + square
+
+class AccumulatorEvaluator(nn.Module):
+    def __init__(self, hidden_size=HIDDEN_SIZE):
+        super().__init__()
+        self.feature_layer = nn.Linear(NUM_FEATURES, hidden_size)
+        self.fc_layers = nn.Sequential(
+            nn.Linear(hidden_size + 5, 32),
+            nn.ReLU(),
+            nn.Linear(32, 1)
+        )
+
+    def forward(self, features, extra):
+        x = torch.clamp(self.feature_layer(features), 0.0, 1.0)
+        x = torch.cat([x, extra], dim=1)
+        return self.fc_layers(x)
+
+def board_to_features(board):
+    """One-hot feature and extra tensors of a single board, as used in training"""
+    features = np.empty((1, NUM_FEATURES), dtype=np.float32)
+    unpack_features(piece_bitboards(board), features[0])
+    extra = np.array([extra_features(board)], dtype=np.float32)
+    return torch.from_numpy(features), torch.from_numpy(extra)
+
+# -------------------------------
+# Incremental Accumulator
+# -------------------------------
+class Accumulator:
+    """NumPy inference for an AccumulatorEvaluator with an accumulator stack
+
+    push/pop mirror board.push/board.pop on the tracked board (push is
+    called just before the move is made): each push adds the weight
+    columns of the pieces a move places and subtracts those it removes.
+    Boards that are not tracked are evaluated from scratch.
+    """
+
+    def __init__(self, evaluator):
+        state = {name: value.detach().cpu().numpy().astype(np.float32)
+                 for name, value in evaluator.state_dict().items()}
+        self.columns = np.ascontiguousarray(state["feature_layer.weight"].T)
+        self.bias = state["feature_layer.bias"]
+        hidden_size = len(self.bias)
+        hidden_weight = state["fc_layers.0.weight"]
+        self.hidden_weight = np.ascontiguousarray(hidden_weight[:, :hidden_size])
+        self.extra_weight = np.ascontiguousarray(hidden_weight[:, hidden_size:])
+        self.hidden_bias = state["fc_layers.0.bias"]
+        self.output_weight = state["fc_layers.2.weight"][0]
+        self.output_bias = float(state["fc_layers.2.bias"][0])
+        self.board = None
+        self.stack = []
+        self.base_ply = 0
+
+    def compute(self, board):
+        """Accumulator of a position, from scratch"""
+        features = np.empty(NUM_FEATURES, dtype=np.uint8)
+        unpack_features(piece_bitboards(board), features)
+        return self.bias + self.columns[np.flatnonzero(features)].sum(axis=0)
+
+    def reset(self, board):
+        """Start tracking board from its current position"""
+        self.board = board
+        self.stack = [self.compute(board)]
+        self.base_ply = len(board.move_stack)
+
+    def push(self, board, move):
+        if board is not self.board:
+            return
+        removed, added = piece_changes(board, move)
+        accumulator = self.stack[-1].copy()
+        for color, piece_type, square in added:
+            accumulator += self.columns[feature_index(color, piece_type, square)]
+        for color, piece_type, square in removed:
+            accumulator -= self.columns[feature_index(color, piece_type, square)]
+        self.stack.append(accumulator)
+
+    def pop(self, board):
+        if board is self.board and len(self.stack) > 1:
+            self.stack.pop()
+
+    def accumulator(self, board):
+        if board is self.board and len(board.move_stack) == self.base_ply + len(self.stack) - 1:
+            return self.stack[-1]
+        return self.compute(board)
+
+    def evaluate(self, board):
+        """Raw network output for board, same scale as AccumulatorEvaluator.forward"""
+        hidden = np.clip(self.accumulator(board), 0.0, 1.0)
+        extra = np.array(extra_features(board), dtype=np.float32)
+        hidden = self.hidden_weight @ hidden + self.extra_weight @ extra + self.hidden_bias
+        return float(self.output_weight @ np.maximum(hidden, 0.0)) + self.output_bias
@@ -0,0 +1,199 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import time
+import chess
+import chess.pgn
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from board_encoding import square_features
+from zobrist import zobrist_hash
+
+# -------------------------------
+# Streaming PGN Pipeline
+# -------------------------------
+# Turns a PGN file of any size into training chunks with bounded memory:
+#   python pgn_pipeline.py lichess_games.pgn positions/ --workers 8
+# The file is cut into shards of about SHARD_MB megabytes at game starts,
+# found by seeking rather than by reading the whole file. Each worker
+# process parses one shard at a time and writes its positions to disk in
+# chunks of CHUNK_POSITIONS rows, so memory is bounded by the shard and
+# chunk sizes. Finished shards are recorded in a checkpoint in the output
+# directory, and an interrupted run started again skips them. Labels are
+# left as NaN for labeler.py, which scores the chunks with engine processes.
+SHARD_MB = 16
+CHUNK_POSITIONS = 65536
+
+# Lichess dumps start every game with its Event tag
+GAME_START = b"[Event "
+
+# Longest possible FEN, the width of the stored strings
+FEN_LENGTH = 92
+
+CHECKPOINT = "checkpoint.json"
+
+def shard_offsets(pgn_path, shard_bytes):
+    """Byte offsets cutting pgn_path into shards of about shard_bytes, each starting at a game"""
+    size = os.path.getsize(pgn_path)
+    offsets = [0]
+    with open(pgn_path, "rb") as f:
+        position = shard_bytes
+        while position < size:
+            f.seek(position)
+            f.readline()  # Rest of a line cut in the middle
+            while True:
+                line_start = f.tell()
+                line = f.readline()
+                if not line or line.startswith(GAME_START):
+                    break
+            if not line:
+                break
+            offsets.append(line_start)
+            position = line_start + shard_bytes
+    offsets.append(size)
+    return offsets
+
+class ChunkWriter:
+    """Buffers positions in fixed-dtype arrays and writes them out CHUNK_POSITIONS at a time
+
+    Each chunk is an .npz file holding features (int8, N x 68: signed
+    piece types per square and castling rights), labels (float32, NaN
+    until labeler.py fills them in), keys (uint64 Zobrist hashes) and fens (S92).
+    """
+
+    def __init__(self, out_dir, shard, chunk_positions=CHUNK_POSITIONS):
+        self.out_dir = out_dir
+        self.shard = shard
+        self.features = np.zeros((chunk_positions, 68), dtype=np.int8)
+        self.labels = np.full(chunk_positions, np.nan, dtype=np.float32)
+        self.keys = np.zeros(chunk_positions, dtype=np.uint64)
+        self.fens = np.zeros(chunk_positions, dtype=f"S{FEN_LENGTH}")
+        self.count = 0
+        self.positions = 0
+        self.files = []
+
+    def add(self, board):
+        row = self.count
+        self.features[row] = square_features(board)
+        self.keys[row] = zobrist_hash(board)
+        self.fens[row] = board.fen().encode()
+        self.count += 1
+        if self.count == len(self.keys):
+            self.flush()
+
+    def flush(self):
+        if self.count == 0:
+            return
+        name = f"chunk_{self.shard:05d}_{len(self.files):04d}.npz"
+        temp_path = os.path.join(self.out_dir, name + ".tmp")
+        with open(temp_path, "wb") as f:
+            np.savez(f, features=self.features[:self.count], labels=self.labels[:self.count],
+                     keys=self.keys[:self.count], fens=self.fens[:self.count])
+        os.replace(temp_path, os.path.join(self.out_dir, name))
+        self.files.append(name)
+        self.positions += self.count
+        self.count = 0
+
+def process_shard(pgn_path, shard, start, end, out_dir, chunk_positions=CHUNK_POSITIONS):
+    """Write the positions of the games in bytes [start, end) of pgn_path; returns the shard's summary"""
+    with open(pgn_path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8", errors="replace")
+    pgn = io.StringIO(text)
+    del text
+
+    writer = ChunkWriter(out_dir, shard, chunk_positions)
+    games = 0
+    while True:
+        game = chess.pgn.read_game(pgn)
+        if game is None:
+            break
+        games += 1
+        board = game.board()
+        for move in game.mainline_moves():
+            board.push(move)
+            writer.add(board)
+    writer.flush()
+    return {"shard": shard, "games": games, "positions": writer.positions,
+            "bytes": end - start, "files": writer.files}
+
+def load_checkpoint(out_dir, run):
+    """Finished shards of an earlier run with the same settings, by shard number"""
+    path = os.path.join(out_dir, CHECKPOINT)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint["run"] != run:
+        raise ValueError(f"{out_dir} holds the output of a different run: {checkpoint['run']}")
+    return {entry["shard"]: entry for entry in checkpoint["shards"]}
+
+def save_checkpoint(out_dir, run, done):
+    path = os.path.join(out_dir, CHECKPOINT)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump({"run": run, "shards": [done[shard] for shard in sorted(done)]}, f, indent=1)
+    os.replace(temp_path, path)
+
+def run_pipeline(pgn_path, out_dir, workers=None, shard_mb=SHARD_MB,
+                 chunk_positions=CHUNK_POSITIONS):
+    """Convert pgn_path into chunks in out_dir in parallel, resuming an interrupted run"""
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    shard_bytes = int(shard_mb * 1024 * 1024)
+    run = {"pgn": os.path.abspath(pgn_path), "size": os.path.getsize(pgn_path),
+           "shard_bytes": shard_bytes, "chunk_positions": chunk_positions}
+    done = load_checkpoint(out_dir, run)
+
+    offsets = shard_offsets(pgn_path, shard_bytes)
+    pending = [shard for shard in range(len(offsets) - 1) if shard not in done]
+    total_bytes = offsets[-1]
+    done_bytes = sum(entry["bytes"] for entry in done.values())
+    if done:
+        print(f"Resuming: {len(done)}/{len(offsets) - 1} shards already done")
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    start_time = time.perf_counter()
+    processed_bytes = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(process_shard, pgn_path, shard, offsets[shard], offsets[shard + 1],
+                               out_dir, chunk_positions) for shard in pending]
+        for future in as_completed(futures):
+            entry = future.result()
+            done[entry["shard"]] = entry
+            save_checkpoint(out_dir, run, done)
+
+            processed_bytes += entry["bytes"]
+            elapsed = time.perf_counter() - start_time
+            rate = processed_bytes / elapsed
+            remaining = total_bytes - done_bytes - processed_bytes
+            print(f"  {len(done)}/{len(offsets) - 1} shards, "
+                  f"{sum(e['games'] for e in done.values())} games, "
+                  f"{sum(e['positions'] for e in done.values())} positions, "
+                  f"{rate / 1e6:.1f} MB/s, ETA {remaining / rate if rate else 0:.0f}s")
+
+    return {"shards": len(done), "games": sum(e["games"] for e in done.values()),
+            "positions": sum(e["positions"] for e in done.values())}
+
+def iter_chunks(out_dir):
+    """Arrays of each chunk of a finished run, in file order"""
+    with open(os.path.join(out_dir, CHECKPOINT)) as f:
+        checkpoint = json.load(f)
+    for entry in checkpoint["shards"]:
+        for name in entry["files"]:
+            with np.load(os.path.join(out_dir, name)) as chunk:
+                yield {key: chunk[key] for key in chunk.files}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a PGN file into training chunks")
+    parser.add_argument("pgn", help="PGN file, e.g. a Lichess database dump")
+    parser.add_argument("out_dir", help="directory for the chunks and the checkpoint")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--shard-mb", type=float, default=SHARD_MB, help="megabytes of PGN per shard")
+    parser.add_argument("--chunk", type=int, default=CHUNK_POSITIONS, help="positions per chunk file")
+    args = parser.parse_args()
+    summary = run_pipeline(args.pgn, args.out_dir, args.workers, args.shard_mb, args.chunk)
+    print(f"Done: {summary['games']} games, {summary['positions']} positions in {summary['shards']} shards")
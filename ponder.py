@@ -0,0 +1,54 @@
+import threading
+import computer_player
+
+# -------------------------------
+# Pondering
+# -------------------------------
+class Ponderer:
+    """Searches the expected reply on a background thread while the opponent thinks
+
+    After the engine moves, start() guesses the opponent's reply and
+    searches the position after it. When the opponent moves, finish()
+    either returns the pondered move (a ponder hit, using the time already
+    spent as part of the move's budget) or stops the search (a miss),
+    which still leaves the transposition table and eval cache warm.
+    """
+
+    def __init__(self, difficulty):
+        self.difficulty = difficulty
+        self.thread = None
+        self.expected_move = None
+        self.best_move = None
+
+    def start(self, board):
+        """Begin pondering; board is the position after the engine's move"""
+        self.stop()
+        self.expected_move = computer_player.expected_reply(board)
+        if self.expected_move is None:
+            return
+        ponder_board = board.copy()
+        ponder_board.push(self.expected_move)
+        self.best_move = None
+        self.thread = threading.Thread(target=self._search, args=(ponder_board,), daemon=True)
+        computer_player.time_manager.arm(self.thread)
+        self.thread.start()
+
+    def _search(self, board):
+        self.best_move = computer_player.ponder_search(board, self.difficulty)
+
+    def stop(self):
+        """Abort pondering and wait for the search thread to exit"""
+        if self.thread is not None:
+            computer_player.time_manager.stop()
+            self.thread.join()
+        self.thread = None
+
+    def finish(self, move, time_left=None):
+        """The opponent played move: the pondered reply on a hit, otherwise None"""
+        if self.thread is None or move != self.expected_move:
+            self.stop()
+            return None
+        computer_player.time_manager.ponderhit(computer_player.move_budget(self.difficulty, time_left))
+        self.thread.join()
+        self.thread = None
+        return self.best_move
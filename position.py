@@ -0,0 +1,542 @@
+import chess
+from chess import (
+    WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    BB_ALL, BB_SQUARES, BB_RANK_1, BB_RANK_3, BB_RANK_4, BB_RANK_5, BB_RANK_6, BB_RANK_8,
+    BB_RANKS, BB_A1, BB_H1, BB_A8, BB_H8, BB_DARK_SQUARES, BB_LIGHT_SQUARES,
+    BB_PAWN_ATTACKS, BB_KNIGHT_ATTACKS, BB_KING_ATTACKS,
+    BB_DIAG_ATTACKS, BB_DIAG_MASKS, BB_RANK_ATTACKS, BB_RANK_MASKS, BB_FILE_ATTACKS, BB_FILE_MASKS,
+    scan_reversed, msb, between, ray, popcount
+)
+
+# -------------------------------
+# Native Search Position
+# -------------------------------
+# A lean standard-chess position for the search: integer bitboards in
+# __slots__ and make/unmake through an undo stack, instead of
+# chess.Board's per-move state snapshots and replayed repetition checks.
+#
+# It implements the part of the chess.Board interface the search,
+# evaluation, Zobrist keys and move ordering use, with the same move
+# generation order, so they run on either unchanged. Moves are interned
+# chess.Move objects, so nothing needs converting at the root.
+
+# MOVES[from_square][to_square], PROMOTIONS[from_square][to_square] in Q, R, B, N order
+MOVES = [[chess.Move(from_square, to_square) for to_square in chess.SQUARES] for from_square in chess.SQUARES]
+PROMOTIONS = [[tuple(chess.Move(from_square, to_square, piece_type) for piece_type in (QUEEN, ROOK, BISHOP, KNIGHT))
+               for to_square in chess.SQUARES] for from_square in chess.SQUARES]
+
+PIECE_ATTRIBUTES = (None, "pawns", "knights", "bishops", "rooks", "queens", "kings")
+BACKRANK_MASKS = (BB_RANK_8, BB_RANK_1)
+PROMOTION_RANKS = BB_RANK_1 | BB_RANK_8
+
+# Castling of each color: (rook square, king target, rook target, squares that must be empty, king path)
+CASTLING = (
+    ((chess.H8, chess.G8, chess.F8, BB_SQUARES[chess.F8] | BB_SQUARES[chess.G8],
+      BB_SQUARES[chess.E8] | BB_SQUARES[chess.F8] | BB_SQUARES[chess.G8]),
+     (chess.A8, chess.C8, chess.D8, BB_SQUARES[chess.B8] | BB_SQUARES[chess.C8] | BB_SQUARES[chess.D8],
+      BB_SQUARES[chess.E8] | BB_SQUARES[chess.D8] | BB_SQUARES[chess.C8])),
+    ((chess.H1, chess.G1, chess.F1, BB_SQUARES[chess.F1] | BB_SQUARES[chess.G1],
+      BB_SQUARES[chess.E1] | BB_SQUARES[chess.F1] | BB_SQUARES[chess.G1]),
+     (chess.A1, chess.C1, chess.D1, BB_SQUARES[chess.B1] | BB_SQUARES[chess.C1] | BB_SQUARES[chess.D1],
+      BB_SQUARES[chess.E1] | BB_SQUARES[chess.D1] | BB_SQUARES[chess.C1])),
+)
+KING_HOMES = (chess.E8, chess.E1)
+
+class Position:
+    """Standard chess position with make/unmake, duck-typing chess.Board for the search
+
+    Build one from a chess.Board; push()/pop() must be given legal moves
+    (or null moves), as in the search.
+    """
+
+    __slots__ = ("pawns", "knights", "bishops", "rooks", "queens", "kings",
+                 "occupied_co", "occupied", "turn", "castling_rights", "ep_square",
+                 "halfmove_clock", "fullmove_number", "move_stack", "root", "_undo")
+
+    def __init__(self, board):
+        self.pawns = board.pawns
+        self.knights = board.knights
+        self.bishops = board.bishops
+        self.rooks = board.rooks
+        self.queens = board.queens
+        self.kings = board.kings
+        self.occupied_co = [board.occupied_co[BLACK], board.occupied_co[WHITE]]
+        self.occupied = board.occupied
+        self.turn = board.turn
+        self.castling_rights = board.clean_castling_rights()
+        self.ep_square = board.ep_square
+        self.halfmove_clock = board.halfmove_clock
+        self.fullmove_number = board.fullmove_number
+        self.move_stack = []
+        self.root = board.copy(stack=False)
+        self._undo = []
+
+    def to_board(self):
+        """chess.Board of the current position"""
+        board = self.root.copy()
+        for move in self.move_stack:
+            board.push(move)
+        return board
+
+    def fen(self):
+        return self.to_board().fen()
+
+    # -------------------------------
+    # Pieces and attacks
+    # -------------------------------
+    def piece_type_at(self, square):
+        mask = BB_SQUARES[square]
+        if not self.occupied & mask:
+            return None
+        elif self.pawns & mask:
+            return PAWN
+        elif self.knights & mask:
+            return KNIGHT
+        elif self.bishops & mask:
+            return BISHOP
+        elif self.rooks & mask:
+            return ROOK
+        elif self.queens & mask:
+            return QUEEN
+        return KING
+
+    def pieces_mask(self, piece_type, color):
+        return getattr(self, PIECE_ATTRIBUTES[piece_type]) & self.occupied_co[color]
+
+    def pieces(self, piece_type, color):
+        return chess.SquareSet(self.pieces_mask(piece_type, color))
+
+    def king(self, color):
+        king_mask = self.kings & self.occupied_co[color]
+        return msb(king_mask) if king_mask else None
+
+    def attacks_mask(self, square):
+        mask = BB_SQUARES[square]
+        if mask & self.pawns:
+            return BB_PAWN_ATTACKS[bool(mask & self.occupied_co[WHITE])][square]
+        elif mask & self.knights:
+            return BB_KNIGHT_ATTACKS[square]
+        elif mask & self.kings:
+            return BB_KING_ATTACKS[square]
+        attacks = 0
+        if mask & (self.bishops | self.queens):
+            attacks = BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & self.occupied]
+        if mask & (self.rooks | self.queens):
+            attacks |= (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & self.occupied]
+                        | BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & self.occupied])
+        return attacks
+
+    def attackers_mask(self, color, square, occupied=None):
+        if occupied is None:
+            occupied = self.occupied
+        queens_and_rooks = self.queens | self.rooks
+        queens_and_bishops = self.queens | self.bishops
+        attackers = (
+            (BB_KING_ATTACKS[square] & self.kings)
+            | (BB_KNIGHT_ATTACKS[square] & self.knights)
+            | (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied] & queens_and_rooks)
+            | (BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied] & queens_and_rooks)
+            | (BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied] & queens_and_bishops)
+            | (BB_PAWN_ATTACKS[not color][square] & self.pawns))
+        return attackers & self.occupied_co[color]
+
+    def is_attacked_by(self, color, square):
+        return bool(self.attackers_mask(color, square))
+
+    def checkers_mask(self):
+        king = self.king(self.turn)
+        return 0 if king is None else self.attackers_mask(not self.turn, king)
+
+    def is_check(self):
+        return bool(self.checkers_mask())
+
+    def has_kingside_castling_rights(self, color):
+        return bool(self.castling_rights & (BB_H1 if color else BB_H8))
+
+    def has_queenside_castling_rights(self, color):
+        return bool(self.castling_rights & (BB_A1 if color else BB_A8))
+
+    # -------------------------------
+    # Move classification
+    # -------------------------------
+    def is_en_passant(self, move):
+        return (self.ep_square == move.to_square
+                and bool(self.pawns & BB_SQUARES[move.from_square])
+                and abs(move.to_square - move.from_square) in (7, 9)
+                and not self.occupied & BB_SQUARES[move.to_square])
+
+    def is_capture(self, move):
+        touched = BB_SQUARES[move.from_square] ^ BB_SQUARES[move.to_square]
+        return bool(touched & self.occupied_co[not self.turn]) or self.is_en_passant(move)
+
+    def is_castling(self, move):
+        if self.kings & BB_SQUARES[move.from_square]:
+            return abs((move.from_square & 7) - (move.to_square & 7)) > 1
+        return False
+
+    def is_kingside_castling(self, move):
+        return self.is_castling(move) and move.to_square > move.from_square
+
+    def gives_check(self, move):
+        self.push(move)
+        try:
+            return self.is_check()
+        finally:
+            self.pop()
+
+    # -------------------------------
+    # Move generation
+    # -------------------------------
+    def generate_pseudo_legal_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        turn = self.turn
+        our_pieces = self.occupied_co[turn]
+        occupied = self.occupied
+
+        for from_square in scan_reversed(our_pieces & ~self.pawns & from_mask):
+            targets = self.attacks_mask(from_square) & ~our_pieces & to_mask
+            moves = MOVES[from_square]
+            for to_square in scan_reversed(targets):
+                yield moves[to_square]
+
+        if from_mask & self.kings:
+            yield from self.generate_castling_moves(from_mask, to_mask)
+
+        pawns = self.pawns & our_pieces & from_mask
+        if not pawns:
+            return
+
+        pawn_attacks = BB_PAWN_ATTACKS[turn]
+        enemies = self.occupied_co[not turn] & to_mask
+        for from_square in scan_reversed(pawns):
+            for to_square in scan_reversed(pawn_attacks[from_square] & enemies):
+                if BB_SQUARES[to_square] & PROMOTION_RANKS:
+                    yield from PROMOTIONS[from_square][to_square]
+                else:
+                    yield MOVES[from_square][to_square]
+
+        if turn == WHITE:
+            single_moves = pawns << 8 & ~occupied
+            double_moves = single_moves << 8 & ~occupied & (BB_RANK_3 | BB_RANK_4)
+            step = -8
+        else:
+            single_moves = pawns >> 8 & ~occupied
+            double_moves = single_moves >> 8 & ~occupied & (BB_RANK_6 | BB_RANK_5)
+            step = 8
+
+        for to_square in scan_reversed(single_moves & to_mask):
+            if BB_SQUARES[to_square] & PROMOTION_RANKS:
+                yield from PROMOTIONS[to_square + step][to_square]
+            else:
+                yield MOVES[to_square + step][to_square]
+
+        for to_square in scan_reversed(double_moves & to_mask):
+            yield MOVES[to_square + 2 * step][to_square]
+
+        if self.ep_square:
+            yield from self.generate_pseudo_legal_ep(from_mask, to_mask)
+
+    def generate_pseudo_legal_ep(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        ep_square = self.ep_square
+        if not ep_square or not BB_SQUARES[ep_square] & to_mask or BB_SQUARES[ep_square] & self.occupied:
+            return
+        capturers = (self.pawns & self.occupied_co[self.turn] & from_mask
+                     & BB_PAWN_ATTACKS[not self.turn][ep_square] & BB_RANKS[4 if self.turn else 3])
+        for capturer in scan_reversed(capturers):
+            yield MOVES[capturer][ep_square]
+
+    def generate_castling_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        turn = self.turn
+        king = KING_HOMES[turn]
+        if not self.castling_rights & BACKRANK_MASKS[turn] or not self.kings & self.occupied_co[turn] & BB_SQUARES[king] & from_mask:
+            return
+        # Kingside first, as chess.Board scans rook squares from h to a
+        for rook, king_to, rook_to, empty, king_path in CASTLING[turn]:
+            if (self.castling_rights & BB_SQUARES[rook] and BB_SQUARES[rook] & to_mask
+                    and not self.occupied & empty
+                    and not any(self.attackers_mask(not turn, square) for square in scan_reversed(king_path))):
+                yield MOVES[king][king_to]
+
+    def _slider_blockers(self, king):
+        snipers = (((BB_RANK_ATTACKS[king][0] | BB_FILE_ATTACKS[king][0]) & (self.rooks | self.queens))
+                   | (BB_DIAG_ATTACKS[king][0] & (self.bishops | self.queens)))
+        blockers = 0
+        for sniper in scan_reversed(snipers & self.occupied_co[not self.turn]):
+            b = between(king, sniper) & self.occupied
+            if b and BB_SQUARES[msb(b)] == b:
+                blockers |= b
+        return blockers & self.occupied_co[self.turn]
+
+    def _pin_mask(self, color, square):
+        king = self.king(color)
+        if king is None:
+            return BB_ALL
+        square_mask = BB_SQUARES[square]
+        for attacks, sliders in ((BB_FILE_ATTACKS, self.rooks | self.queens),
+                                 (BB_RANK_ATTACKS, self.rooks | self.queens),
+                                 (BB_DIAG_ATTACKS, self.bishops | self.queens)):
+            rays = attacks[king][0]
+            if rays & square_mask:
+                for sniper in scan_reversed(rays & sliders & self.occupied_co[not color]):
+                    if between(sniper, king) & (self.occupied | square_mask) == square_mask:
+                        return ray(king, sniper)
+                break
+        return BB_ALL
+
+    def _ep_skewered(self, king, capturer):
+        last_double = self.ep_square + (-8 if self.turn == WHITE else 8)
+        occupancy = (self.occupied & ~BB_SQUARES[last_double] & ~BB_SQUARES[capturer]
+                     | BB_SQUARES[self.ep_square])
+        them = self.occupied_co[not self.turn]
+        if BB_RANK_ATTACKS[king][BB_RANK_MASKS[king] & occupancy] & them & (self.rooks | self.queens):
+            return True
+        return bool(BB_DIAG_ATTACKS[king][BB_DIAG_MASKS[king] & occupancy] & them & (self.bishops | self.queens))
+
+    def _is_safe(self, king, blockers, move):
+        if move.from_square == king:
+            if self.is_castling(move):
+                return True
+            return not self.attackers_mask(not self.turn, move.to_square)
+        elif self.is_en_passant(move):
+            return bool(self._pin_mask(self.turn, move.from_square) & BB_SQUARES[move.to_square]
+                        and not self._ep_skewered(king, move.from_square))
+        return bool(not blockers & BB_SQUARES[move.from_square]
+                    or ray(move.from_square, move.to_square) & BB_SQUARES[king])
+
+    def _generate_evasions(self, king, checkers, from_mask=BB_ALL, to_mask=BB_ALL):
+        attacked = 0
+        for checker in scan_reversed(checkers & (self.bishops | self.rooks | self.queens)):
+            attacked |= ray(king, checker) & ~BB_SQUARES[checker]
+
+        if BB_SQUARES[king] & from_mask:
+            targets = BB_KING_ATTACKS[king] & ~self.occupied_co[self.turn] & ~attacked & to_mask
+            for to_square in scan_reversed(targets):
+                yield MOVES[king][to_square]
+
+        checker = msb(checkers)
+        if BB_SQUARES[checker] == checkers:
+            # Capture or block a single checker
+            target = between(king, checker) | checkers
+            yield from self.generate_pseudo_legal_moves(~self.kings & from_mask, target & to_mask)
+            # Capture a checking pawn en passant
+            if self.ep_square and not BB_SQUARES[self.ep_square] & target:
+                last_double = self.ep_square + (-8 if self.turn == WHITE else 8)
+                if last_double == checker:
+                    yield from self.generate_pseudo_legal_ep(from_mask, to_mask)
+
+    def generate_legal_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        king_mask = self.kings & self.occupied_co[self.turn]
+        if not king_mask:
+            yield from self.generate_pseudo_legal_moves(from_mask, to_mask)
+            return
+        king = msb(king_mask)
+        blockers = self._slider_blockers(king)
+        checkers = self.attackers_mask(not self.turn, king)
+        if checkers:
+            moves = self._generate_evasions(king, checkers, from_mask, to_mask)
+        else:
+            moves = self.generate_pseudo_legal_moves(from_mask, to_mask)
+        is_safe = self._is_safe
+        for move in moves:
+            if is_safe(king, blockers, move):
+                yield move
+
+    def generate_legal_ep(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        for move in self.generate_pseudo_legal_ep(from_mask, to_mask):
+            if not self.is_into_check(move):
+                yield move
+
+    def generate_legal_captures(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        yield from self.generate_legal_moves(from_mask, to_mask & self.occupied_co[not self.turn])
+        yield from self.generate_legal_ep(from_mask, to_mask)
+
+    @property
+    def legal_moves(self):
+        return list(self.generate_legal_moves())
+
+    def is_into_check(self, move):
+        king = self.king(self.turn)
+        if king is None:
+            return False
+        checkers = self.attackers_mask(not self.turn, king)
+        if checkers and move not in self._generate_evasions(king, checkers, BB_SQUARES[move.from_square],
+                                                            BB_SQUARES[move.to_square]):
+            return True
+        return not self._is_safe(king, self._slider_blockers(king), move)
+
+    def is_pseudo_legal(self, move):
+        if not move or move.drop:
+            return False
+        piece = self.piece_type_at(move.from_square)
+        from_mask = BB_SQUARES[move.from_square]
+        to_mask = BB_SQUARES[move.to_square]
+        if not piece or not self.occupied_co[self.turn] & from_mask:
+            return False
+        if move.promotion:
+            if piece != PAWN or not to_mask & BACKRANK_MASKS[not self.turn]:
+                return False
+        if piece == KING and move in self.generate_castling_moves():
+            return True
+        if self.occupied_co[self.turn] & to_mask:
+            return False
+        if piece == PAWN:
+            return move in self.generate_pseudo_legal_moves(from_mask, to_mask)
+        return bool(self.attacks_mask(move.from_square) & to_mask)
+
+    def is_legal(self, move):
+        return self.is_pseudo_legal(move) and not self.is_into_check(move)
+
+    # -------------------------------
+    # Game end
+    # -------------------------------
+    def is_checkmate(self):
+        return self.is_check() and not any(self.generate_legal_moves())
+
+    def is_stalemate(self):
+        return not self.is_check() and not any(self.generate_legal_moves())
+
+    def has_insufficient_material(self, color):
+        ours = self.occupied_co[color]
+        if ours & (self.pawns | self.rooks | self.queens):
+            return False
+        if ours & self.knights:
+            return popcount(ours) <= 2 and not (self.occupied_co[not color] & ~self.kings & ~self.queens)
+        if ours & self.bishops:
+            same_color = (not self.bishops & BB_DARK_SQUARES) or (not self.bishops & BB_LIGHT_SQUARES)
+            return same_color and not self.pawns and not self.knights
+        return True
+
+    def is_insufficient_material(self):
+        return self.has_insufficient_material(WHITE) and self.has_insufficient_material(BLACK)
+
+    def _transposition_key(self):
+        ep_square = self.ep_square if self.ep_square is not None and any(self.generate_legal_ep()) else None
+        return (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings,
+                self.occupied_co[WHITE], self.occupied_co[BLACK], self.turn, self.castling_rights, ep_square)
+
+    def is_repetition(self, count=3):
+        """Whether the position occurred count times since the last capture or pawn move"""
+        plies = min(self.halfmove_clock, len(self._undo))
+        if plies < 4 * (count - 1):
+            return False
+        key = self._transposition_key()
+        replay = []
+        try:
+            for _ in range(plies):
+                replay.append(self.pop())
+                if self._transposition_key() == key:
+                    count -= 1
+                    if count <= 1:
+                        return True
+        finally:
+            while replay:
+                self.push(replay.pop())
+        return False
+
+    def is_game_over(self):
+        """chess.Board.is_game_over() without draw claims"""
+        if not any(self.generate_legal_moves()) or self.is_insufficient_material():
+            return True
+        return self.halfmove_clock >= 150 or self.is_repetition(5)
+
+    # -------------------------------
+    # Make / unmake
+    # -------------------------------
+    def _toggle(self, color, piece_type, mask):
+        attribute = PIECE_ATTRIBUTES[piece_type]
+        setattr(self, attribute, getattr(self, attribute) ^ mask)
+        self.occupied_co[color] ^= mask
+        self.occupied ^= mask
+
+    def push(self, move):
+        turn = self.turn
+        castling_rights = self.castling_rights
+        ep_square = self.ep_square
+        halfmove_clock = self.halfmove_clock
+        self.move_stack.append(move)
+        self.ep_square = None
+        self.halfmove_clock += 1
+        if turn == BLACK:
+            self.fullmove_number += 1
+        if not move:
+            self._undo.append((castling_rights, ep_square, halfmove_clock, None, None, None))
+            self.turn = not turn
+            return
+
+        from_square, to_square = move.from_square, move.to_square
+        from_mask, to_mask = BB_SQUARES[from_square], BB_SQUARES[to_square]
+        piece_type = self.piece_type_at(from_square)
+        captured = self.piece_type_at(to_square)
+        capture_square = to_square
+
+        self.castling_rights &= ~from_mask & ~to_mask
+        if piece_type == KING:
+            self.castling_rights &= ~BACKRANK_MASKS[turn]
+        elif piece_type == PAWN:
+            diff = to_square - from_square
+            if diff == 16 or diff == -16:
+                self.ep_square = from_square + diff // 2
+            elif to_square == ep_square and not captured:
+                capture_square = to_square - 8 if turn == WHITE else to_square + 8
+                captured = PAWN
+        if piece_type == PAWN or captured:
+            self.halfmove_clock = 0
+
+        if captured:
+            self._toggle(not turn, captured, BB_SQUARES[capture_square])
+        self._toggle(turn, piece_type, from_mask)
+        self._toggle(turn, move.promotion or piece_type, to_mask)
+        if piece_type == KING and abs(to_square - from_square) == 2:
+            kingside = to_square > from_square
+            rook_from = to_square + 1 if kingside else to_square - 2
+            rook_to = to_square - 1 if kingside else to_square + 1
+            self._toggle(turn, ROOK, BB_SQUARES[rook_from] | BB_SQUARES[rook_to])
+
+        self._undo.append((castling_rights, ep_square, halfmove_clock, piece_type, captured, capture_square))
+        self.turn = not turn
+
+    def pop(self):
+        move = self.move_stack.pop()
+        castling_rights, ep_square, halfmove_clock, piece_type, captured, capture_square = self._undo.pop()
+        self.turn = turn = not self.turn
+        if turn == BLACK:
+            self.fullmove_number -= 1
+        self.castling_rights = castling_rights
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        if not move:
+            return move
+
+        from_square, to_square = move.from_square, move.to_square
+        if piece_type == KING and abs(to_square - from_square) == 2:
+            kingside = to_square > from_square
+            rook_from = to_square + 1 if kingside else to_square - 2
+            rook_to = to_square - 1 if kingside else to_square + 1
+            self._toggle(turn, ROOK, BB_SQUARES[rook_from] | BB_SQUARES[rook_to])
+        self._toggle(turn, move.promotion or piece_type, BB_SQUARES[to_square])
+        self._toggle(turn, piece_type, BB_SQUARES[from_square])
+        if captured:
+            self._toggle(not turn, captured, BB_SQUARES[capture_square])
+        return move
+
+# -------------------------------
+# Perft
+# -------------------------------
+def perft(board, depth):
+    """Number of leaf nodes of the legal move tree to depth, for chess.Board or Position"""
+    if depth <= 1:
+        return sum(1 for _ in board.generate_legal_moves()) if depth == 1 else 1
+    nodes = 0
+    for move in list(board.generate_legal_moves()):
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+def perft_divide(board, depth):
+    """Perft count below each legal move, keyed by UCI"""
+    counts = {}
+    for move in list(board.generate_legal_moves()):
+        board.push(move)
+        counts[move.uci()] = perft(board, depth - 1)
+        board.pop()
+    return counts
@@ -0,0 +1,223 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import numpy as np
+from dataset import DatasetWriter, open_records, record_phases, PHASES
+from zobrist import RANDOM_ARRAY
+
+# -------------------------------
+# Position Index
+# -------------------------------
+# Deduplicates a dataset.py file by Zobrist key, out of core:
+#   python position_index.py build positions.bin positions.idx
+#   python position_index.py sample positions.idx positions.bin sampled.bin \
+#       --count 1000000 --phases opening=0.2,middlegame=0.5,endgame=0.3
+# Building streams the records once, computing each key from the stored
+# bitboards and flags, and appends (key, row, score, phase) entries to
+# bucket files by the key's top bits, buffering BUFFER_ENTRIES of them at a
+# time and opening one bucket file at a time, so the number of buckets is
+# not limited by the open file limit. Each bucket is then sorted and its
+# duplicates merged (mean score, count, first row); as buckets partition
+# the key range in order, writing them one after another produces one
+# file sorted by key. The reader memory-maps it and finds keys by binary
+# search, so neither step needs more memory than one bucket or buffer.
+INDEX_DTYPE = np.dtype([("key", "<u8"), ("row", "<u8"), ("count", "<u4"),
+                        ("score", "<f4"), ("phase", "u1")])
+ENTRY_DTYPE = np.dtype([("key", "<u8"), ("row", "<u8"), ("score", "<i2"), ("phase", "u1")])
+
+# Records hashed per block, the target number of entries per bucket, and
+# the entries buffered before they are appended to the bucket files
+BLOCK_RECORDS = 8192
+BUCKET_ENTRIES = 4 * 1024 * 1024
+BUFFER_ENTRIES = 4 * 1024 * 1024
+
+# Polyglot keys by (channel, square) in piece_bitboards channel order
+# (white pieces first); Polyglot numbers black pieces before white ones
+CHANNEL_KEYS = np.array([
+    [RANDOM_ARRAY[64 * ((channel % 6) * 2 + (channel < 6)) + square] for square in range(64)]
+    for channel in range(12)
+], dtype=np.uint64).reshape(768)
+# Castling keys in extra_features order (WK, WQ, BK, BQ), then side to move
+CASTLING_KEYS = np.array(RANDOM_ARRAY[768:772], dtype=np.uint64)
+TURN_KEY = np.uint64(RANDOM_ARRAY[780])
+
+def record_keys(records):
+    """Polyglot Zobrist keys of records, without the en passant part the format does not store"""
+    bits = np.unpackbits(np.ascontiguousarray(records["bitboards"], dtype="<u8").view(np.uint8),
+                         bitorder="little").reshape(len(records), 768).astype(bool)
+    keys = np.bitwise_xor.reduce(np.where(bits, CHANNEL_KEYS, np.uint64(0)), axis=1)
+    flags = np.asarray(records["flags"])
+    for bit, key in enumerate(CASTLING_KEYS):
+        keys[(flags >> bit & 1).astype(bool)] ^= key
+    keys[(flags >> 4 & 1).astype(bool)] ^= TURN_KEY
+    return keys
+
+def bucket_path(bucket_dir, bucket):
+    return os.path.join(bucket_dir, f"{bucket:04d}.bin")
+
+def append_to_buckets(entries, bucket_dir, bucket_bits):
+    """Append entries to the bucket files of their keys' top bucket_bits bits, one file open at a time"""
+    if bucket_bits:
+        bucket_ids = (entries["key"] >> np.uint64(64 - bucket_bits)).astype(np.int64)
+        order = np.argsort(bucket_ids, kind="stable")
+        entries, bucket_ids = entries[order], bucket_ids[order]
+        bounds = np.searchsorted(bucket_ids, np.arange((1 << bucket_bits) + 1))
+    else:
+        bounds = np.array([0, len(entries)])
+    for bucket in np.flatnonzero(np.diff(bounds)):
+        with open(bucket_path(bucket_dir, bucket), "ab") as f:
+            entries[bounds[bucket]:bounds[bucket + 1]].tofile(f)
+
+def build_index(dataset_path, index_path, bucket_bits=None):
+    """Write the deduplicated, key-sorted index of a dataset file; returns its metadata"""
+    records = open_records(dataset_path)
+    if bucket_bits is None:
+        bucket_bits = min(12, max(0, math.ceil(math.log2(max(len(records), 1) / BUCKET_ENTRIES))))
+    bucket_dir = index_path + ".buckets"
+    # Buckets are appended to, so leftovers of an interrupted build must go
+    shutil.rmtree(bucket_dir, ignore_errors=True)
+    os.makedirs(bucket_dir)
+
+    # Pass 1: partition entries into buckets by the top bits of their key
+    pending, buffered = [], 0
+    for start in range(0, len(records), BLOCK_RECORDS):
+        block = np.array(records[start:start + BLOCK_RECORDS])
+        entries = np.empty(len(block), dtype=ENTRY_DTYPE)
+        entries["key"] = record_keys(block)
+        entries["row"] = np.arange(start, start + len(block), dtype=np.uint64)
+        entries["score"] = block["score"]
+        entries["phase"] = record_phases(block["flags"])
+        pending.append(entries)
+        buffered += len(entries)
+        if buffered >= BUFFER_ENTRIES:
+            append_to_buckets(np.concatenate(pending), bucket_dir, bucket_bits)
+            pending, buffered = [], 0
+    if pending:
+        append_to_buckets(np.concatenate(pending), bucket_dir, bucket_bits)
+
+    # Pass 2: sort each bucket and merge its duplicates
+    unique = 0
+    phase_counts = [0] * len(PHASES)
+    with open(index_path, "wb") as out:
+        for bucket in range(1 << bucket_bits):
+            path = bucket_path(bucket_dir, bucket)
+            if not os.path.exists(path):
+                continue
+            entries = np.fromfile(path, dtype=ENTRY_DTYPE)
+            os.remove(path)
+            entries = entries[np.lexsort((entries["row"], entries["key"]))]
+            keys, first, counts = np.unique(entries["key"], return_index=True, return_counts=True)
+            merged = np.empty(len(keys), dtype=INDEX_DTYPE)
+            merged["key"] = keys
+            merged["row"] = entries["row"][first]
+            merged["count"] = counts
+            merged["score"] = np.add.reduceat(entries["score"].astype(np.float64), first) / counts
+            merged["phase"] = entries["phase"][first]
+            merged.tofile(out)
+            unique += len(merged)
+            for phase, count in enumerate(np.bincount(merged["phase"], minlength=len(PHASES))[:len(PHASES)]):
+                phase_counts[phase] += int(count)
+    shutil.rmtree(bucket_dir)
+
+    metadata = {"dataset": os.path.abspath(dataset_path), "records": len(records), "unique": unique,
+                "bucket_bits": bucket_bits, "phases": dict(zip(PHASES, phase_counts))}
+    with open(index_path + ".json", "w") as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+class PositionIndex:
+    """Memory-mapped, key-sorted index written by build_index"""
+
+    def __init__(self, index_path):
+        with open(index_path + ".json") as f:
+            self.metadata = json.load(f)
+        count = self.metadata["unique"]
+        self.entries = (np.memmap(index_path, dtype=INDEX_DTYPE, mode="r", shape=(count,)) if count
+                        else np.zeros(0, dtype=INDEX_DTYPE))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key):
+        """Index entry of a Zobrist key, or None"""
+        keys = self.entries["key"]
+        position = np.searchsorted(keys, np.uint64(key))
+        if position < len(keys) and keys[position] == key:
+            return self.entries[position]
+        return None
+
+    def sample(self, count, phase_weights=None, seed=0):
+        """Entries drawn without replacement, count * weight of them from each game phase
+
+        phase_weights maps phase names to shares (normalized); without it
+        positions are drawn uniformly. A phase with fewer positions than
+        its share contributes all it has. The phase column is read once to
+        find each phase's rows, and each phase's sample is drawn from those.
+        """
+        rng = np.random.default_rng(seed)
+        total = len(self.entries)
+        if phase_weights is None:
+            rows = rng.choice(total, min(count, total), replace=False)
+            return self.entries[np.sort(rows)]
+
+        weight_sum = sum(phase_weights.values())
+        available = self.metadata["phases"]
+        quotas = {PHASES.index(phase): min(available[phase], round(count * weight / weight_sum))
+                  for phase, weight in phase_weights.items()}
+        phases = np.asarray(self.entries["phase"])
+        rows = [np.zeros(0, dtype=np.int64)]
+        for phase, quota in quotas.items():
+            candidates = np.flatnonzero(phases == phase)
+            rows.append(candidates[rng.choice(len(candidates), quota, replace=False)])
+        return self.entries[np.sort(np.concatenate(rows))]
+
+def write_entries(entries, dataset_path, output_path):
+    """Write the dataset records of index entries, each with its duplicates' mean score"""
+    records = open_records(dataset_path)
+    with DatasetWriter(output_path) as writer:
+        for start in range(0, len(entries), BLOCK_RECORDS):
+            block = entries[start:start + BLOCK_RECORDS]
+            selected = np.array(records[block["row"].astype(np.int64)])
+            selected["score"] = np.round(block["score"]).astype(np.int16)
+            writer.add_records(selected)
+    return len(entries)
+
+def parse_phase_weights(text):
+    """"opening=0.2,middlegame=0.5,endgame=0.3" -> {"opening": 0.2, ...}"""
+    weights = {}
+    for item in text.split(","):
+        phase, _, weight = item.partition("=")
+        if phase not in PHASES:
+            raise ValueError(f"Unknown game phase: {phase}")
+        weights[phase] = float(weight)
+    return weights
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate and sample a dataset.py position file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index a dataset file by Zobrist key")
+    build.add_argument("dataset")
+    build.add_argument("index")
+    build.add_argument("--bucket-bits", type=int, help="2^bits bucket files (default: from the dataset size)")
+    sample = commands.add_parser("sample", help="write unique positions, optionally phase-stratified")
+    sample.add_argument("index")
+    sample.add_argument("dataset", help="the dataset file the index was built from")
+    sample.add_argument("output", help="dataset file to write")
+    sample.add_argument("--count", type=int, help="positions to sample (default: all unique positions)")
+    sample.add_argument("--phases", help="phase shares, e.g. opening=0.2,middlegame=0.5,endgame=0.3")
+    sample.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        metadata = build_index(args.dataset, args.index, args.bucket_bits)
+        print(f"{metadata['records']} records, {metadata['unique']} unique positions: {metadata['phases']}")
+    else:
+        index = PositionIndex(args.index)
+        if args.count is None and args.phases is None:
+            entries = index.entries
+        else:
+            weights = parse_phase_weights(args.phases) if args.phases else None
+            entries = index.sample(args.count or len(index), weights, args.seed)
+        print(f"Wrote {write_entries(entries, args.dataset, args.output)} positions to {args.output}")
@@ -0,0 +1,117 @@
+import json
+import time
+
+# -------------------------------
+# Search Statistics
+# -------------------------------
+# Counters of one search, collected only while a SearchStats object is
+# installed as computer_player.search_stats (select_best_move's stats
+# argument). Node, transposition table and cache counts are read from the
+# engine's own counters at each iteration, so the search itself only pays
+# for the TT cutoff count and the timers around network calls and move
+# generation, and nothing at all when no stats object is installed.
+COUNTERS = ("nodes", "qsearch_nodes", "tt_probes", "tt_hits", "cache_hits", "cache_misses")
+
+class SearchStats:
+    """Nodes, cache hits, network and move generation time, and per-iteration timings of a search
+
+    callback, if given, is called with the stats object after every
+    completed iteration. With profile_path the search also runs under
+    cProfile and the profile is written there (read it with pstats).
+    """
+
+    def __init__(self, callback=None, profile_path=None):
+        self.callback = callback
+        self.profile_path = profile_path
+        self.reset()
+
+    def reset(self):
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.tt_cutoffs = 0
+        self.nn_calls = 0
+        self.nn_batches = 0
+        self.nn_time = 0.0
+        self.movegen_time = 0.0
+        self.depth = 0
+        self.elapsed = 0.0
+        self.iterations = []
+        self._base = None
+        self._start_time = None
+        self._iteration_start = None
+
+    def begin(self, counters):
+        """Start timing; counters are the engine's current values of COUNTERS"""
+        self._base = counters
+        self._start_time = self._iteration_start = time.perf_counter()
+
+    def update(self, counters):
+        """Totals since begin() from the engine's current counters"""
+        for name, base, value in zip(COUNTERS, self._base, counters):
+            setattr(self, name, value - base)
+        self.elapsed = time.perf_counter() - self._start_time
+
+    def end_iteration(self, depth, score, move, counters):
+        """Record a completed iteration and report it to the callback"""
+        previous_nodes = self.nodes
+        self.update(counters)
+        now = time.perf_counter()
+        self.depth = depth
+        self.iterations.append({
+            "depth": depth,
+            "score": score,
+            "move": move.uci() if move else None,
+            "nodes": self.nodes - previous_nodes,
+            "seconds": now - self._iteration_start
+        })
+        self._iteration_start = now
+        if self.callback is not None:
+            self.callback(self)
+
+    def record_nn(self, positions, seconds):
+        """Count one network call scoring positions positions"""
+        self.nn_calls += positions
+        self.nn_batches += 1
+        self.nn_time += seconds
+
+    def timed_moves(self, moves):
+        """Pass through a lazy move generator, adding the time spent generating to movegen_time"""
+        moves = iter(moves)
+        while True:
+            start_time = time.perf_counter()
+            try:
+                move = next(moves)
+            except StopIteration:
+                self.movegen_time += time.perf_counter() - start_time
+                return
+            self.movegen_time += time.perf_counter() - start_time
+            yield move
+
+    def as_dict(self):
+        stats = {name: getattr(self, name) for name in COUNTERS}
+        lookups = max(self.cache_hits + self.cache_misses, 1)
+        stats.update({
+            "tt_cutoffs": self.tt_cutoffs,
+            "cache_hit_rate": self.cache_hits / lookups,
+            "nn_calls": self.nn_calls,
+            "nn_batches": self.nn_batches,
+            "nn_time": self.nn_time,
+            "movegen_time": self.movegen_time,
+            "depth": self.depth,
+            "elapsed": self.elapsed,
+            "nps": self.nodes / self.elapsed if self.elapsed else 0.0,
+            "iterations": list(self.iterations)
+        })
+        return stats
+
+    def dump(self, path):
+        """Write the statistics as JSON to path"""
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def summary(self):
+        """One-line report of the search"""
+        return (f"depth {self.depth}  nodes {self.nodes} ({self.qsearch_nodes} quiescence)  "
+                f"{self.elapsed:.2f}s  NN {self.nn_calls} positions / {self.nn_time:.2f}s  "
+                f"movegen {self.movegen_time:.2f}s  TT hits {self.tt_hits}/{self.tt_probes} "
+                f"cutoffs {self.tt_cutoffs}  cache hits {self.cache_hits}")
@@ -0,0 +1,110 @@
+import atexit
+import multiprocessing
+import time
+import torch
+from concurrent.futures import ProcessPoolExecutor
+from transposition import TranspositionTable
+import computer_player
+
+# -------------------------------
+# Lazy SMP Worker Pool
+# -------------------------------
+# Every worker process runs its own iterative deepening on the same root
+# and they cooperate only through one transposition table in shared
+# memory. Odd-numbered helpers start a ply deeper so the workers spread
+# over neighbouring depths instead of repeating each other's work.
+#
+# Workers are forked where possible: they inherit the loaded model and
+# the GUI's main.py, which has no __main__ guard, is never re-imported.
+_pool = None
+_pool_config = None
+_shared_table = None
+
+# computer_player switches copied into every worker
+MIRRORED_SETTINGS = ("SEARCH_ALGORITHM", "QSEARCH_MAX_DEPTH", "QSEARCH_CHECK_PLIES",
+                     "QSEARCH_DELTA", "QSEARCH_SEE", "NULL_MOVE_PRUNING", "LATE_MOVE_REDUCTIONS",
+                     "FUTILITY_PRUNING", "RAZORING", "NATIVE_POSITION")
+
+def _search_config():
+    """Engine configuration the workers are started with"""
+    settings = tuple((name, getattr(computer_player, name)) for name in MIRRORED_SETTINGS)
+    return (computer_player.TT_SIZE_MB, computer_player.EVALUATOR,
+            computer_player.accumulator_weights, settings)
+
+def _init_worker(table_name, config):
+    size_mb, evaluator, weights_path, settings = config
+    torch.set_num_threads(1)
+    computer_player.transposition_table = TranspositionTable.attach_shared(table_name, size_mb)
+    if evaluator != computer_player.EVALUATOR:
+        computer_player.set_evaluator(evaluator, weights_path)
+    for name, value in settings:
+        setattr(computer_player, name, value)
+    # A new SEARCH_ALGORITHM gets a new pool and table, so the shared table
+    # already holds this algorithm's scores; prepare_search must not clear
+    # it while sibling workers are writing to it
+    computer_player._table_algorithm = computer_player.SEARCH_ALGORITHM
+
+def _search_worker(board, max_depth, time_limit, worker_id, generation):
+    computer_player.prepare_search(board)
+    computer_player.transposition_table.generation = generation
+    computer_player.node_count = 0
+
+    start_depth = 1 + worker_id % 2
+    start_time = time.time()
+    move, score, depth = computer_player.iterative_deepening(
+        board, max_depth, time_limit, start_depth
+    )
+    return move, score, depth, computer_player.node_count, time.time() - start_time
+
+def get_pool(workers):
+    """Process pool of workers attached to a shared transposition table, reused between searches"""
+    global _pool, _pool_config, _shared_table
+    config = _search_config()
+    if _pool is not None and _pool_config == (workers, config):
+        return _pool, _shared_table
+
+    shutdown_pool()
+    computer_player.load_model()  # Load once here rather than in every worker
+    _shared_table = TranspositionTable.create_shared(computer_player.TT_SIZE_MB)
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    _pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(_shared_table.shm.name, config)
+    )
+    _pool_config = (workers, config)
+    return _pool, _shared_table
+
+def shutdown_pool():
+    """Stop the worker processes and free the shared table"""
+    global _pool, _pool_config, _shared_table
+    if _pool is not None:
+        _pool.shutdown()
+    if _shared_table is not None:
+        _shared_table.close(unlink=True)
+    _pool = None
+    _pool_config = None
+    _shared_table = None
+
+atexit.register(shutdown_pool)
+
+def parallel_search(board, max_depth, time_limit, workers):
+    """Lazy SMP search, returning (best_move, score, completed depth, total nodes)"""
+    pool, table = get_pool(workers)
+    table.new_search()
+
+    futures = [
+        pool.submit(_search_worker, board.copy(), max_depth, time_limit, worker_id, table.generation)
+        for worker_id in range(workers)
+    ]
+    results = [future.result() for future in futures]
+
+    # The deepest completed iteration wins, lower worker ids on ties
+    best_move, best_score, best_depth = None, None, 0
+    for move, score, depth, _, _ in results:
+        if move is not None and depth > best_depth:
+            best_move, best_score, best_depth = move, score, depth
+    nodes = sum(result[3] for result in results)
+    return best_move, best_score, best_depth, nodes
@@ -0,0 +1,85 @@
+import sys
+import chess
+import chess.engine
+import numpy as np
+from labeler import EnginePool, label_boards, material_score
+from zobrist import zobrist_hash
+
+# -------------------------------
+# Stub UCI Engine
+# -------------------------------
+# Logs the FEN of every position it is asked to analyse. With White to
+# move it scores the position as its piece count; with Black to move it
+# reports no score, which the labeler must flag as a fallback label.
+STUB_ENGINE = """
+import sys
+import chess
+
+sys.stdout.reconfigure(line_buffering=True)
+board = chess.Board()
+with open(sys.argv[1], "a") as log:
+    for line in sys.stdin:
+        tokens = line.split()
+        if not tokens:
+            continue
+        if tokens[0] == "uci":
+            print("id name stub")
+            print("uciok")
+        elif tokens[0] == "isready":
+            print("readyok")
+        elif tokens[0] == "position":
+            moves = tokens.index("moves") if "moves" in tokens else len(tokens)
+            board = chess.Board() if tokens[1] == "startpos" else chess.Board(" ".join(tokens[2:moves]))
+            for move in tokens[moves + 1:]:
+                board.push_uci(move)
+        elif tokens[0] == "go":
+            log.write(board.fen() + "\\n")
+            log.flush()
+            if board.turn == chess.WHITE:
+                print(f"info depth 1 score cp {len(board.piece_map())}")
+            print(f"bestmove {next(iter(board.legal_moves)).uci()}")
+        elif tokens[0] == "quit":
+            break
+"""
+
+def stub_command(tmp_path):
+    script = tmp_path / "stub_engine.py"
+    script.write_text(STUB_ENGINE)
+    log = tmp_path / "analysed.txt"
+    return [sys.executable, str(script), str(log)], log
+
+def game_boards():
+    """Positions of a short game that returns to earlier positions, plus repeats"""
+    board = chess.Board()
+    boards = []
+    for move in ["e4", "e5", "Nf3", "Nc6", "Ng1", "Nb8", "Nf3"]:
+        board.push_san(move)
+        boards.append(board.copy())
+    return boards + boards[:2]
+
+def test_distinct_positions_analysed_once(tmp_path):
+    command, log = stub_command(tmp_path)
+    boards = game_boards()
+    with EnginePool(command, processes=2) as pool:
+        pool.label(boards, limit=chess.engine.Limit(depth=1))
+
+    analysed = log.read_text().splitlines()
+    assert len(analysed) == len({zobrist_hash(board) for board in boards}) == 5
+
+def test_failed_analyses_are_flagged(tmp_path):
+    command, _ = stub_command(tmp_path)
+    boards = game_boards()
+    with EnginePool(command, processes=2) as pool:
+        scores, fallback = pool.label(boards, limit=chess.engine.Limit(depth=1))
+
+    for board, score, fell_back in zip(boards, scores, fallback):
+        if board.turn == chess.WHITE:
+            assert not fell_back and score == len(board.piece_map())
+        else:
+            assert fell_back and score == material_score(board)
+
+def test_missing_engine_labels_by_material(tmp_path):
+    boards = game_boards()
+    scores, fallback = label_boards(boards, command=str(tmp_path / "no_such_engine"))
+    assert fallback.all()
+    assert np.array_equal(scores, [material_score(board) for board in boards])
\ No newline at end of file
@@ -0,0 +1,31 @@
+import computer_player
+import match_runner
+from match_runner import EngineSide, parse_engine
+
+# -------------------------------
+# Engine Settings Isolation
+# -------------------------------
+def test_sides_search_with_their_own_settings(monkeypatch):
+    defaults = {name: getattr(computer_player, name) for name in dir(computer_player) if name.isupper()}
+    monkeypatch.setattr(match_runner, "_defaults", defaults)
+    for name, value in defaults.items():
+        monkeypatch.setattr(computer_player, name, value)
+    for name in ("transposition_table", "move_orderer", "nn_cache", "accumulator", "_table_algorithm"):
+        monkeypatch.setattr(computer_player, name, getattr(computer_player, name))
+
+    first = parse_engine("name=pvs,SEARCH_ALGORITHM=pvs,NULL_MOVE_PRUNING=False")
+    second = parse_engine("name=alphabeta")
+    overridden = set(first["settings"]) | set(second["settings"])
+    sides = [EngineSide(first, overridden), EngineSide(second, overridden)]
+
+    seen = []
+    for side in sides + sides:
+        side.activate()
+        seen.append((computer_player.SEARCH_ALGORITHM, computer_player.NULL_MOVE_PRUNING,
+                     computer_player._table_algorithm))
+        assert computer_player.transposition_table is side.transposition_table
+
+    assert seen[0] == seen[2] == ("pvs", False, "pvs")
+    assert seen[1] == seen[3] == (defaults["SEARCH_ALGORITHM"], defaults["NULL_MOVE_PRUNING"],
+                                  defaults["SEARCH_ALGORITHM"])
+    assert seen[0] != seen[1]
\ No newline at end of file
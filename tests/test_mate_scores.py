@@ -0,0 +1,38 @@
+import chess
+import pytest
+import torch
+import computer_player
+from computer_player import ChessEvaluator
+
+# -------------------------------
+# Mate Scores in the Transposition Table
+# -------------------------------
+# A mate found at the root must read as further away when the same position
+# is met deeper in a later search
+MATE_IN_TWO = "kbK5/pp6/1P6/8/8/8/8/R7 w - - 0 1"
+MATE_PLIES = 3
+DEPTH = 4
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    """An untrained ChessEvaluator: the real network's cost without its weights file"""
+    torch.manual_seed(0)
+    monkeypatch.setattr(computer_player, "model", ChessEvaluator().to(computer_player.device).eval())
+    computer_player.nn_cache.clear()
+    computer_player.transposition_table.clear()
+
+@pytest.mark.parametrize("score", [0, 150, -150, computer_player.MATE_SCORE - 3, -computer_player.MATE_SCORE + 4])
+@pytest.mark.parametrize("ply", [0, 1, 7])
+def test_table_conversion_round_trips(score, ply):
+    assert computer_player.score_from_table(computer_player.score_to_table(score, ply), ply) == score
+
+def test_mate_probed_deeper_keeps_distance_from_root(stub_model, monkeypatch):
+    monkeypatch.setattr(computer_player, "SEARCH_ALGORITHM", "pvs")
+    board = chess.Board(MATE_IN_TWO)
+    computer_player.prepare_search(board)
+    _, score, _ = computer_player.iterative_deepening(board, DEPTH, None)
+    assert score == computer_player.MATE_SCORE - MATE_PLIES
+
+    # The same position two plies into a search: its entries are now probed at ply 2
+    score, _ = computer_player.pvs(board, DEPTH, -computer_player.INFINITY, computer_player.INFINITY, ply=2, on_pv=False)
+    assert score == computer_player.MATE_SCORE - MATE_PLIES - 2
\ No newline at end of file
@@ -0,0 +1,29 @@
+import chess
+import pytest
+from move_ordering import MoveOrderer
+from position import Position
+
+# -------------------------------
+# Staged Move Ordering
+# -------------------------------
+# Black can castle kingside while e8h8 (a rook move elsewhere in the tree)
+# sits in the killer slots or comes back as a hash move: board.is_legal reads
+# it as king-takes-rook castling, a second copy of e8g8
+CASTLING_FEN = "rnb1k2r/pp3p2/2pbp2p/qN1p4/4n2P/2PPKPp1/PPQ1P1P1/1RB2BNR b kq - 0 14"
+ROOK_MOVE = chess.Move.from_uci("e8h8")
+PLY = 3
+
+@pytest.mark.parametrize("make_board", [chess.Board, lambda fen: Position(chess.Board(fen))])
+@pytest.mark.parametrize("stage", ["hash", "killer"])
+def test_castling_as_rook_move_is_not_searched_twice(make_board, stage):
+    board = make_board(CASTLING_FEN)
+    orderer = MoveOrderer()
+    if stage == "hash":
+        moves = list(orderer.moves(board, ROOK_MOVE, PLY))
+    else:
+        orderer.killers[PLY][0] = ROOK_MOVE
+        moves = list(orderer.moves(board, None, PLY))
+
+    assert ROOK_MOVE not in moves
+    assert len(moves) == len(set(moves))
+    assert set(moves) == set(chess.Board(CASTLING_FEN).legal_moves)
\ No newline at end of file
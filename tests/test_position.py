@@ -0,0 +1,51 @@
+import random
+import chess
+import chess.polyglot
+import pytest
+from benchmark import PERFT_POSITIONS
+from position import Position, perft
+from zobrist import ZobristTracker
+
+# -------------------------------
+# Native Position
+# -------------------------------
+# Position must agree with chess.Board wherever the search uses it: the
+# known perft counts, and move by move along random games from the perft
+# positions (which cover castling, en passant and promotions)
+MAX_PERFT_NODES = 10000
+GAMES_PER_POSITION = 3
+MAX_PLIES = 80
+
+PERFT_CASES = [(fen, depth, count) for fen, counts in PERFT_POSITIONS
+               for depth, count in enumerate(counts, 1) if count <= MAX_PERFT_NODES]
+
+@pytest.mark.parametrize("fen, depth, count", PERFT_CASES)
+def test_perft_matches_known_counts(fen, depth, count):
+    position = Position(chess.Board(fen))
+    assert perft(position, depth) == count
+    assert position.fen() == chess.Board(fen).fen()
+
+@pytest.mark.parametrize("fen", [fen for fen, _ in PERFT_POSITIONS])
+def test_random_games_match_board(fen):
+    rng = random.Random(fen)
+    for _ in range(GAMES_PER_POSITION):
+        board = chess.Board(fen)
+        position = Position(board.copy())
+        keys = ZobristTracker()
+        keys.reset(position)
+        for _ in range(MAX_PLIES):
+            assert list(position.generate_legal_moves()) == list(board.generate_legal_moves())
+            assert list(position.generate_legal_captures()) == list(board.generate_legal_captures())
+            assert position.is_check() == board.is_check()
+            assert keys.key(position) == chess.polyglot.zobrist_hash(board)
+            if board.is_game_over():
+                break
+            move = rng.choice(list(board.legal_moves))
+            board.push(move)
+            keys.push(position, move)
+
+        # Unmaking the whole game restores the starting position
+        while position.move_stack:
+            keys.pop(position)
+        assert position.fen() == chess.Board(fen).fen()
+        assert keys.key(position) == chess.polyglot.zobrist_hash(chess.Board(fen))
\ No newline at end of file
@@ -0,0 +1,48 @@
+import chess
+import pytest
+import torch
+import computer_player
+from computer_player import ChessEvaluator
+
+# -------------------------------
+# Tactical Regression
+# -------------------------------
+# Forced mates within "depth" plies, with every solution listed: a mate
+# score outweighs any evaluation, so even an untrained model must find
+# them under every selectivity configuration
+TACTICAL_POSITIONS = [
+    ("6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1", ["a1a8"], 1),  # Back rank mate
+    ("r1r3k1/5ppp/8/8/8/8/5PPP/R5K1 b - - 0 1", ["a8a1"], 1),  # Back rank mate (Black)
+    ("r1bqkbnr/pppp1ppp/2n5/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 0 1", ["h5f7"], 1),  # Scholar's mate
+    ("6rk/6pp/8/6N1/8/8/8/6K1 w - - 0 1", ["g5f7"], 1),  # Smothered mate
+    ("r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 1", ["d5f6"], 3),  # Knight sacrifice, mate in 2
+    ("r2Bk2r/ppp2ppp/3p4/2bNp3/2Pnn1b1/3P4/PP2NPPP/R2QKB1R b KQkq - 1 1", ["d4f3"], 3),  # The same for Black
+    ("k7/8/2K5/8/8/8/8/7R w - - 0 1", ["c6c7", "c6b6"], 3),  # Quiet king move, mate in 2
+]
+
+SELECTIVITY_SETTINGS = ("NULL_MOVE_PRUNING", "LATE_MOVE_REDUCTIONS", "FUTILITY_PRUNING", "RAZORING")
+
+# No selectivity, each technique on its own, and all of them
+SELECTIVITY_CONFIGS = {"none": dict.fromkeys(SELECTIVITY_SETTINGS, False),
+                       "all": dict.fromkeys(SELECTIVITY_SETTINGS, True)}
+for setting in SELECTIVITY_SETTINGS:
+    SELECTIVITY_CONFIGS[setting.lower()] = {other: other == setting for other in SELECTIVITY_SETTINGS}
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    """An untrained ChessEvaluator: the real network's cost without its weights file"""
+    torch.manual_seed(0)
+    monkeypatch.setattr(computer_player, "model", ChessEvaluator().to(computer_player.device).eval())
+    computer_player.nn_cache.clear()
+    computer_player.transposition_table.clear()
+
+@pytest.mark.parametrize("config", SELECTIVITY_CONFIGS.values(), ids=SELECTIVITY_CONFIGS.keys())
+@pytest.mark.parametrize("fen, best_moves, depth", TACTICAL_POSITIONS)
+def test_selectivity_keeps_forced_mates(stub_model, monkeypatch, config, fen, best_moves, depth):
+    monkeypatch.setattr(computer_player, "SEARCH_ALGORITHM", "pvs")
+    for setting, value in config.items():
+        monkeypatch.setattr(computer_player, setting, value)
+    board = chess.Board(fen)
+    computer_player.prepare_search(board)
+    move, _, _ = computer_player.iterative_deepening(board, depth, None)
+    assert move is not None and move.uci() in best_moves
\ No newline at end of file
@@ -0,0 +1,46 @@
+import time
+import chess
+import pytest
+import torch
+import computer_player
+from computer_player import ChessEvaluator
+
+# -------------------------------
+# Hard Time Budget
+# -------------------------------
+# An aborted search may overrun its budget only by the work done between
+# two deadline checks
+BUDGET = 0.1
+TOLERANCE = 0.01
+
+POSITIONS = [
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r2q1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2Q1RK1 w - - 0 10",
+    "2r2rk1/1b2qppp/p3pn2/1p6/3N4/P1B1P3/1P2QPPP/2RR2K1 b - - 0 19",
+    "8/5pk1/6p1/3P4/4K3/6P1/8/8 w - - 0 45",
+]
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    """An untrained ChessEvaluator: the real network's cost without its weights file"""
+    torch.manual_seed(0)
+    monkeypatch.setattr(computer_player, "model", ChessEvaluator().to(computer_player.device).eval())
+    computer_player.nn_cache.clear()
+    computer_player.transposition_table.clear()
+
+@pytest.mark.parametrize("algorithm", ["alphabeta", "pvs"])
+def test_aborted_search_keeps_to_budget(stub_model, monkeypatch, algorithm):
+    monkeypatch.setattr(computer_player, "SEARCH_ALGORITHM", algorithm)
+    for fen in POSITIONS:
+        board = chess.Board(fen)
+        computer_player.prepare_search(board)
+        start_time = time.perf_counter()
+        move, _, depth = computer_player.iterative_deepening(board, 20, BUDGET)
+        overshoot = time.perf_counter() - start_time - BUDGET
+
+        assert overshoot <= TOLERANCE, f"{fen}: {overshoot * 1000:.1f} ms past the budget"
+        assert depth < 20, "the search finished instead of being aborted"
+        # Without a completed iteration there is no move; callers fall back to order_moves
+        assert (move is None) == (depth == 0)
+        assert move is None or move in board.legal_moves
+        assert board == chess.Board(fen)
\ No newline at end of file
@@ -0,0 +1,90 @@
+import threading
+import time
+
+# -------------------------------
+# Time Management
+# -------------------------------
+# Fraction of the budget after which no new iteration is started: a
+# deeper iteration started late would almost certainly be aborted.
+SOFT_LIMIT_FRACTION = 0.6
+# Moves the remaining clock is spread over when none is given
+DEFAULT_MOVES_TO_GO = 30
+# Time kept back for move transmission and GUI updates
+MOVE_OVERHEAD = 0.05
+
+class SearchAborted(Exception):
+    """Raised inside the search when its deadline passes or it is stopped"""
+
+def allocate_time(remaining, increment=0.0, moves_to_go=None, max_time=None):
+    """Seconds to spend on this move given the remaining clock and increment"""
+    moves = moves_to_go or DEFAULT_MOVES_TO_GO
+    budget = remaining / moves + increment * 0.8
+    # Never plan to use more than half of what is left
+    budget = min(budget, remaining * 0.5 - MOVE_OVERHEAD)
+    if max_time is not None:
+        budget = min(budget, max_time)
+    return max(budget, 0.01)
+
+class TimeManager:
+    """Deadline for one search, checked by the search every few nodes
+
+    A search run on a background thread is registered with arm() before
+    the thread starts, so that a stop() or ponderhit() arriving before it
+    calls start() still applies to it rather than being reset.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.budget = None
+        self.deadline = None
+        self.stopped = False
+        self.armed_thread = None
+        self.pending_budget = None
+        self.lock = threading.Lock()
+
+    def arm(self, thread):
+        """Direct stop() and ponderhit() at the search thread is about to run"""
+        with self.lock:
+            self.armed_thread = thread
+            self.stopped = False
+            self.pending_budget = None
+
+    def start(self, budget=None):
+        """Begin timing a search; budget None means no time limit"""
+        with self.lock:
+            self.start_time = time.perf_counter()
+            if threading.current_thread() is self.armed_thread:
+                # Keep a stop() or ponderhit() made while the thread was starting up
+                self.armed_thread = None
+                if self.pending_budget is not None:
+                    budget = self.pending_budget
+            else:
+                self.stopped = False
+            self.pending_budget = None
+            self.budget = budget
+            self.deadline = None if budget is None else self.start_time + budget
+
+    def stop(self):
+        """Ask the running or armed search to abort (safe to call from another thread)"""
+        self.stopped = True
+
+    def ponderhit(self, budget):
+        """Give a search started without a deadline a budget counted from its start"""
+        with self.lock:
+            self.pending_budget = budget
+            self.budget = budget
+            self.deadline = self.start_time + budget
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    def check(self):
+        """Raise SearchAborted if the search must stop now"""
+        if self.stopped or (self.deadline is not None and time.perf_counter() >= self.deadline):
+            raise SearchAborted
+
+    def can_start_iteration(self):
+        """Whether there is enough time left to begin another iteration"""
+        if self.stopped:
+            return False
+        return self.budget is None or self.elapsed() < self.budget * SOFT_LIMIT_FRACTION
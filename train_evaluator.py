@@ -0,0 +1,157 @@
+import argparse
+import os
+import random
+import time
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+import computer_player
+from computer_player import ChessEvaluator
+from dataset import PositionDataset, open_records, record_board
+
+# -------------------------------
+# ChessEvaluator Training
+# -------------------------------
+# Trains the network computer_player loads, from a dataset.py file:
+#   python train_evaluator.py positions.bin --epochs 10 --output chess_evaluator_2mil.pth
+# Inputs come from PositionDataset, which unpacks the stored bitboards with
+# the same board_encoding functions board_to_tensor uses; check_encoding
+# compares the two on a sample of records before training starts.
+# Runs are reproducible for a given seed and worker count, and a
+# checkpoint written after every epoch lets an interrupted run resume.
+VALIDATION_FRACTION = 0.02
+ENCODING_CHECK_SAMPLES = 512
+LOG_EVERY = 100
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+def seed_worker(worker_id):
+    """DataLoader worker seeds derived from the loader's base seed"""
+    seed = torch.initial_seed() % 2 ** 32
+    np.random.seed(seed)
+    random.seed(seed)
+
+def check_encoding(dataset_path, samples=ENCODING_CHECK_SAMPLES, seed=0):
+    """Fail unless PositionDataset inputs equal board_to_tensor's for sampled records"""
+    records = open_records(dataset_path)
+    rows = np.random.default_rng(seed).choice(len(records), min(samples, len(records)), replace=False)
+    dataset = PositionDataset(dataset_path)
+    for row, (planes, extras, _) in zip(rows, dataset.__getitems__(rows)):
+        board_tensor, extra_tensor = computer_player.board_to_tensor(record_board(records[row]))
+        if not (torch.equal(planes, board_tensor[0]) and torch.equal(extras, extra_tensor[0])):
+            raise AssertionError(f"record {row} encodes differently from board_to_tensor")
+    return len(rows)
+
+def autocast_dtype(device):
+    """bfloat16 where the device has hardware support for it, else None (full precision)"""
+    if device.type == "cuda":
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else None
+    # Without AVX512-BF16 or AMX a CPU emulates bfloat16, more slowly than float32
+    probes = ("_is_avx512_bf16_supported", "_is_amx_tile_supported")
+    if any(getattr(torch.cpu, probe, lambda: False)() for probe in probes):
+        return torch.bfloat16
+    return None
+
+def split_indices(length, seed, fraction=VALIDATION_FRACTION):
+    """Seeded train/validation split of record indices"""
+    order = np.random.default_rng(seed).permutation(length)
+    validation = max(1, int(length * fraction))
+    return np.sort(order[validation:]), np.sort(order[:validation])
+
+def evaluate(model, loader, device, amp_dtype):
+    """Mean squared error of model over loader"""
+    model.eval()
+    total, count = 0.0, 0
+    with torch.no_grad():
+        for planes, extras, targets in loader:
+            planes, extras, targets = (tensor.to(device, non_blocking=True) for tensor in (planes, extras, targets))
+            with torch.autocast(device.type, dtype=amp_dtype or torch.float32, enabled=amp_dtype is not None):
+                prediction = model(planes, extras).view(-1)
+            total += torch.nn.functional.mse_loss(prediction.float(), targets, reduction="sum").item()
+            count += len(targets)
+    model.train()
+    return total / max(count, 1)
+
+def train(dataset_path, output="chess_evaluator.pth", epochs=10, batch_size=512, lr=1e-3,
+          workers=4, seed=42, checkpoint="train_checkpoint.pth", amp=True):
+    """Train ChessEvaluator on a dataset file, resuming from checkpoint if it exists"""
+    seed_everything(seed)
+    device = computer_player.device
+    print(f"Encoding check: {check_encoding(dataset_path)} records match board_to_tensor")
+
+    train_rows, validation_rows = split_indices(len(open_records(dataset_path)), seed)
+    generator = torch.Generator()
+    generator.manual_seed(seed)
+    loader_options = {"batch_size": batch_size, "num_workers": workers, "pin_memory": device.type == "cuda",
+                      "worker_init_fn": seed_worker, "persistent_workers": workers > 0}
+    train_loader = DataLoader(PositionDataset(dataset_path, train_rows), shuffle=True, generator=generator,
+                              drop_last=True, **loader_options)
+    validation_loader = DataLoader(PositionDataset(dataset_path, validation_rows), **loader_options)
+
+    model = ChessEvaluator().to(device)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    amp_dtype = autocast_dtype(device) if amp else None
+    start_epoch = 0
+    if checkpoint and os.path.exists(checkpoint):
+        state = torch.load(checkpoint, map_location=device)
+        model.load_state_dict(state["model"])
+        optimizer.load_state_dict(state["optimizer"])
+        generator.set_state(state["generator"])
+        start_epoch = state["epoch"]
+        print(f"Resuming from {checkpoint} after epoch {start_epoch}")
+    print(f"Training on {len(train_rows)} positions, validating on {len(validation_rows)}, "
+          f"{'bfloat16 autocast' if amp_dtype else 'float32'} on {device}")
+
+    for epoch in range(start_epoch, epochs):
+        total_loss, seen = 0.0, 0
+        epoch_start = time.perf_counter()
+        window_start, window_seen = epoch_start, 0
+        for step, (planes, extras, targets) in enumerate(train_loader, 1):
+            planes, extras, targets = (tensor.to(device, non_blocking=True) for tensor in (planes, extras, targets))
+            with torch.autocast(device.type, dtype=amp_dtype or torch.float32, enabled=amp_dtype is not None):
+                prediction = model(planes, extras).view(-1)
+            loss = torch.nn.functional.mse_loss(prediction.float(), targets)
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(targets)
+            seen += len(targets)
+            window_seen += len(targets)
+            if step % LOG_EVERY == 0:
+                rate = window_seen / (time.perf_counter() - window_start)
+                print(f"  epoch {epoch + 1} step {step}: loss {total_loss / seen:.5f}, {rate:.0f} positions/s")
+                window_start, window_seen = time.perf_counter(), 0
+
+        rate = seen / (time.perf_counter() - epoch_start)
+        validation_loss = evaluate(model, validation_loader, device, amp_dtype)
+        print(f"Epoch {epoch + 1}/{epochs}: train loss {total_loss / max(seen, 1):.5f}, "
+              f"validation loss {validation_loss:.5f}, {rate:.0f} positions/s")
+        if checkpoint:
+            # The generator state makes the resumed epochs shuffle as an uninterrupted run would
+            temp_path = checkpoint + ".tmp"
+            torch.save({"model": model.state_dict(), "optimizer": optimizer.state_dict(),
+                        "generator": generator.get_state(), "epoch": epoch + 1}, temp_path)
+            os.replace(temp_path, checkpoint)
+
+    torch.save(model.state_dict(), output)
+    print(f"Model saved to {output}")
+    return model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train ChessEvaluator on a dataset.py position file")
+    parser.add_argument("dataset", help="dataset file written by dataset.py")
+    parser.add_argument("--output", default="chess_evaluator.pth", help="where to save the trained weights")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--workers", type=int, default=4, help="DataLoader worker processes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--checkpoint", default="train_checkpoint.pth", help="per-epoch checkpoint to resume from")
+    parser.add_argument("--no-amp", action="store_true", help="train in float32 even where bfloat16 is supported")
+    args = parser.parse_args()
+    train(args.dataset, args.output, args.epochs, args.batch_size, args.lr, args.workers, args.seed,
+          args.checkpoint, not args.no_amp)
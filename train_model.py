@@ -4,11 +4,16 @@ import numpy as np
 from sklearn.neural_network import MLPRegressor
 import joblib
 import io
+import torch
+from board_encoding import piece_bitboards, extra_features, square_features, unpack_features
+from nnue import AccumulatorEvaluator, NUM_FEATURES
+from labeler import label_boards
+from dataset import SCORE_LIMIT, SCORE_SCALE
 
 def process_pgn_file(pgn_path):
     """Process a single PGN file containing multiple games"""
     X = []
-    y = []
+    boards = []
     
     with open(pgn_path) as f:
         while True:
@@ -19,51 +24,12 @@ def process_pgn_file(pgn_path):
             board = game.board()
             for move in game.mainline_moves():
                 board.push(move)
-                
-                # Extract features
-                features = []
-                for square in chess.SQUARES:
-                    piece = board.piece_at(square)
-                    if piece:
-                        val = piece.piece_type * (1 if piece.color == chess.WHITE else -1)
-                    else:
-                        val = 0
-                    features.append(val)
-                
-                # Add castling rights
-                features += [
-                    int(board.has_kingside_castling_rights(chess.WHITE)),
-                    int(board.has_queenside_castling_rights(chess.WHITE)),
-                    int(board.has_kingside_castling_rights(chess.BLACK)),
-                    int(board.has_queenside_castling_rights(chess.BLACK))
-                ]
-                
-                # Get evaluation from Stockfish
-                try:
-                    with chess.engine.SimpleEngine.popen_uci("stockfish") as engine:
-                        info = engine.analyse(board, chess.engine.Limit(time=0.1))
-                        score = info["score"].white().score(mate_score=10000)
-                        if score is None:  # Handle mate situations
-                            score = 10000 if info["score"].white().mate() > 0 else -10000
-                except:
-                    # Fallback to material evaluation
-                    score = sum(
-                        PIECE_VALUES.get(p.piece_type, 0) * (1 if p.color == chess.WHITE else -1)
-                        for p in board.piece_map().values()
-                    )
-                
-                X.append(features)
-                y.append(np.tanh(score/1000))  # Normalize to [-1, 1]
+                X.append(square_features(board))
+                boards.append(board.copy(stack=False))
     
-    return np.array(X), np.array(y)
-
-PIECE_VALUES = {
-    chess.PAWN: 1,
-    chess.KNIGHT: 3,
-    chess.BISHOP: 3,
-    chess.ROOK: 5,
-    chess.QUEEN: 9
-}
+    # One pool of engine processes for all positions
+    scores, _ = label_boards(boards)
+    return np.array(X), np.tanh(scores / 1000)  # Normalize to [-1, 1]
 
 def train_and_save_model(pgn_path, model_path='chess_eval_model.pkl'):
     """Train and save the evaluation model"""
@@ -85,5 +51,62 @@ def train_and_save_model(pgn_path, model_path='chess_eval_model.pkl'):
     print(f"Model saved to {model_path}")
     return model
 
+def process_pgn_file_accumulator(pgn_path):
+    """Bitboard, extra-feature and label arrays for training AccumulatorEvaluator"""
+    bitboards = []
+    extras = []
+    boards = []
+    
+    with open(pgn_path) as f:
+        while True:
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+                
+            board = game.board()
+            for move in game.mainline_moves():
+                board.push(move)
+                bitboards.append(piece_bitboards(board))
+                extras.append(extra_features(board))
+                boards.append(board.copy(stack=False))
+    
+    scores, _ = label_boards(boards)
+    # Linear targets, as train_evaluator uses: finish_evaluation scales the output back to centipawns
+    targets = np.clip(scores, -SCORE_LIMIT, SCORE_LIMIT) / SCORE_SCALE
+    return (np.array(bitboards, dtype=np.uint64), np.array(extras, dtype=np.float32),
+            targets.astype(np.float32))
+
+def train_accumulator_model(pgn_path, model_path='chess_accumulator.pth',
+                            epochs=10, batch_size=256, lr=1e-3):
+    """Train and save the incrementally updatable AccumulatorEvaluator"""
+    bitboards, extras, y = process_pgn_file_accumulator(pgn_path)
+    
+    print(f"Training accumulator evaluator on {len(y)} positions...")
+    
+    torch.manual_seed(42)
+    model = AccumulatorEvaluator()
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    loss_fn = torch.nn.MSELoss()
+    features = np.empty((batch_size, NUM_FEATURES), dtype=np.float32)
+    
+    for epoch in range(epochs):
+        order = np.random.permutation(len(y))
+        total_loss = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            batch_features = unpack_features(bitboards[batch], features[:len(batch)])
+            prediction = model(torch.from_numpy(batch_features), torch.from_numpy(extras[batch]))
+            loss = loss_fn(prediction.view(-1), torch.from_numpy(y[batch]))
+            
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(batch)
+        print(f"Epoch {epoch + 1}/{epochs}: loss {total_loss / len(y):.5f}")
+    
+    torch.save(model.state_dict(), model_path)
+    print(f"Model saved to {model_path}")
+    return model
+
 if __name__ == "__main__":
     train_and_save_model("sample_1000.pgn")
\ No newline at end of file
@@ -0,0 +1,164 @@
+import chess
+import struct
+import numpy as np
+from multiprocessing import shared_memory
+
+# -------------------------------
+# Entry Layout
+# -------------------------------
+# Each entry is two uint64 words: a packed data word and a check word
+# holding key ^ data. A probe only trusts an entry whose check word XORs
+# back to the probed key, so a half-written entry is treated as a miss.
+#
+# data word: score (float32 bits) | move << 32 | depth << 48 | flag << 56 | generation << 58
+EXACT, LOWERBOUND, UPPERBOUND = 1, 2, 3
+ENTRY_BYTES = 16
+GENERATION_MASK = 0x3F
+
+_float_bits = struct.Struct("<f")
+_uint_bits = struct.Struct("<I")
+
+def encode_move(move):
+    """Pack a move into 15 bits (0 for no move)"""
+    if not move:
+        return 0
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+def decode_move(code):
+    """Inverse of encode_move"""
+    if not code:
+        return None
+    return chess.Move(code & 0x3F, code >> 6 & 0x3F, (code >> 12) or None)
+
+def table_buckets(size_mb):
+    """Number of two-slot buckets in a table of size_mb megabytes"""
+    return max(1, int(size_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+
+def pack_entry(score, move, depth, flag, generation):
+    score_bits = _uint_bits.unpack(_float_bits.pack(score))[0]
+    return (score_bits | encode_move(move) << 32 | min(max(depth, 0), 0xFF) << 48
+            | flag << 56 | generation << 58)
+
+def unpack_entry(data):
+    """(score, best_move, depth, flag) of a data word"""
+    score = _float_bits.unpack(_uint_bits.pack(data & 0xFFFFFFFF))[0]
+    return score, decode_move(data >> 32 & 0xFFFF), data >> 48 & 0xFF, data >> 56 & 0x3
+
+# -------------------------------
+# Transposition Table
+# -------------------------------
+class TranspositionTable:
+    """Fixed-size hash table in two NumPy columns, indexed by key modulo size
+
+    Each bucket has a depth-preferred slot and an always-replace slot.
+    Entries survive between searches; new_search() starts a new
+    generation so entries from earlier moves can be overwritten first.
+    The columns can live in shared memory so several search processes
+    use one table without locks.
+    """
+
+    def __init__(self, size_mb=16, buffer=None):
+        self.size_mb = size_mb
+        self.num_buckets = table_buckets(size_mb)
+        self.shm = None
+        num_entries = 2 * self.num_buckets
+        if buffer is None:
+            storage = np.zeros(2 * num_entries, dtype=np.uint64)
+        else:
+            storage = np.ndarray((2 * num_entries,), dtype=np.uint64, buffer=buffer)
+        self.data = storage[:num_entries]
+        self.checks = storage[num_entries:]
+        # Plain memoryviews give fast Python-int access to single entries
+        self._data = memoryview(self.data).cast("B").cast("Q")
+        self._checks = memoryview(self.checks).cast("B").cast("Q")
+        self.generation = 0
+        self.reset_stats()
+
+    @classmethod
+    def create_shared(cls, size_mb):
+        """Table backed by a new named shared memory block"""
+        shm = shared_memory.SharedMemory(create=True, size=table_buckets(size_mb) * 2 * ENTRY_BYTES)
+        table = cls(size_mb, buffer=shm.buf)
+        table.shm = shm
+        table.clear()
+        return table
+
+    @classmethod
+    def attach_shared(cls, name, size_mb):
+        """Table backed by the shared memory block another process created"""
+        shm = shared_memory.SharedMemory(name=name)
+        table = cls(size_mb, buffer=shm.buf)
+        table.shm = shm
+        return table
+
+    def close(self, unlink=False):
+        """Release a shared memory backed table"""
+        if self.shm is None:
+            return
+        self._data.release()
+        self._checks.release()
+        del self.data, self.checks, self._data, self._checks
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+        self.shm = None
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Age existing entries so they are replaced before current ones"""
+        self.generation = (self.generation + 1) & GENERATION_MASK
+
+    def clear(self):
+        self.data[:] = 0
+        self.checks[:] = 0
+        self.reset_stats()
+
+    def probe(self, key):
+        """(score, best_move, depth, flag) stored for key, or None"""
+        self.probes += 1
+        slot = (key % self.num_buckets) * 2
+        occupied = False
+        for index in (slot, slot + 1):
+            data = self._data[index]
+            if data:
+                if self._checks[index] ^ data == key:
+                    self.hits += 1
+                    return unpack_entry(data)
+                occupied = True
+        if occupied:
+            self.collisions += 1
+        return None
+
+    def store(self, key, score, best_move, depth, flag):
+        self.stores += 1
+        slot = (key % self.num_buckets) * 2
+        data = self._data[slot]
+        if data:
+            same_key = self._checks[slot] ^ data == key
+            stale = (data >> 58) != self.generation
+            if not (same_key or stale or depth >= (data >> 48 & 0xFF)):
+                slot += 1  # Keep the deeper entry, use the always-replace slot
+        new_data = pack_entry(score, best_move, depth, flag, self.generation)
+        self._data[slot] = new_data
+        self._checks[slot] = key ^ new_data
+
+    def fill(self):
+        """Fraction of slots in use"""
+        return float(np.count_nonzero(self.data)) / len(self.data)
+
+    def stats(self):
+        probes = max(self.probes, 1)
+        return {
+            "size_mb": self.size_mb,
+            "entries": len(self.data),
+            "probes": self.probes,
+            "hit_rate": self.hits / probes,
+            "collision_rate": self.collisions / probes,
+            "stores": self.stores,
+            "fill": self.fill()
+        }
@@ -0,0 +1,266 @@
+import sys
+import threading
+import chess
+import computer_player
+from search_stats import SearchStats
+from time_manager import allocate_time
+
+# -------------------------------
+# UCI Front-End
+# -------------------------------
+# Runs the engine headless under any UCI GUI or match runner:
+#   python uci.py
+# Commands are read on the main thread and the search runs on a
+# background thread, so "stop", "ponderhit" and "isready" are answered
+# while it is thinking. A stopped search still reports the best move of
+# its last completed iteration.
+ENGINE_NAME = "Chess-Game-Bot"
+ENGINE_AUTHOR = "slayer3103"
+
+# Depth limit of searches bounded only by time (or by "stop")
+MAX_DEPTH = 64
+
+# "go" with neither a clock, a move time, a depth nor "infinite"
+DEFAULT_DIFFICULTY = "hard"
+
+class UCIEngine:
+    """UCI protocol handler around computer_player's search"""
+
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.board = chess.Board()
+        self.thread = None
+        # Set when a search that must wait ("go infinite", "go ponder") may report its move
+        self.release = threading.Event()
+        self.pondering = False
+        self.ponder_budget = None
+        self.search_turn = chess.WHITE
+        self.threads = computer_player.SEARCH_WORKERS
+        self.own_book = True
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def run(self, lines=sys.stdin):
+        """Process commands until "quit" or end of input"""
+        for line in lines:
+            if not self.handle(line.strip()):
+                break
+        self.stop()
+
+    def handle(self, line):
+        """Process one command; False once the engine should exit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {computer_player.TT_SIZE_MB} min 1 max 4096")
+            self.send(f"option name Threads type spin default {self.threads} min 1 max 64")
+            self.send("option name Ponder type check default false")
+            self.send("option name OwnBook type check default true")
+            self.send(f"option name SearchAlgorithm type combo default {computer_player.SEARCH_ALGORITHM}"
+                      " var alphabeta var pvs")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(args)
+        elif command == "ucinewgame":
+            self.stop()
+            computer_player.transposition_table.clear()
+            computer_player.move_orderer.clear()
+            computer_player.nn_cache.clear()
+        elif command == "position":
+            self.stop()
+            self.set_position(args)
+        elif command == "go":
+            self.stop()
+            self.go(args)
+        elif command == "stop":
+            self.stop()
+        elif command == "ponderhit":
+            self.ponderhit()
+        elif command == "quit":
+            return False
+        return True
+
+    def set_option(self, args):
+        """setoption name <name> value <value>; names may contain spaces"""
+        if "name" not in args:
+            return
+        start = args.index("name") + 1
+        end = args.index("value") if "value" in args else len(args)
+        name = " ".join(args[start:end]).lower()
+        value = " ".join(args[end + 1:])
+        try:
+            if name == "hash":
+                self.stop()
+                computer_player.TT_SIZE_MB = int(value)
+                computer_player.resize_transposition_table(int(value))
+            elif name == "threads":
+                self.threads = max(1, int(value))
+            elif name == "ownbook":
+                self.own_book = value.lower() == "true"
+            elif name == "searchalgorithm" and value in ("alphabeta", "pvs"):
+                computer_player.SEARCH_ALGORITHM = value
+        except ValueError:
+            self.send(f"info string invalid value for {name}: {value}")
+
+    def set_position(self, args):
+        """position [startpos | fen <fen>] [moves <move>...]"""
+        moves_index = args.index("moves") if "moves" in args else len(args)
+        if args and args[0] == "fen":
+            try:
+                board = chess.Board(" ".join(args[1:moves_index]))
+            except ValueError:
+                self.send("info string invalid fen")
+                return
+        else:
+            board = chess.Board()
+        for uci in args[moves_index + 1:]:
+            try:
+                board.push_uci(uci)
+            except ValueError:
+                self.send(f"info string illegal move {uci}")
+                break
+        self.board = board
+
+    def go(self, args):
+        """Start a search on the background thread"""
+        params = {}
+        index = 0
+        while index < len(args):
+            token = args[index]
+            if token in ("infinite", "ponder"):
+                params[token] = True
+            elif token == "searchmoves":
+                break  # Not supported: the whole move list is always searched
+            elif index + 1 < len(args):
+                try:
+                    params[token] = int(args[index + 1])
+                except ValueError:
+                    pass
+                index += 1
+            index += 1
+
+        budget = None
+        clock, increment = ("wtime", "winc") if self.board.turn == chess.WHITE else ("btime", "binc")
+        if "movetime" in params:
+            budget = params["movetime"] / 1000
+        elif clock in params:
+            budget = allocate_time(params[clock] / 1000, params.get(increment, 0) / 1000,
+                                   params.get("movestogo"))
+        max_depth = params.get("depth", MAX_DEPTH)
+        infinite = params.get("infinite", False)
+        if infinite:
+            budget = None
+        elif budget is None and "depth" not in params and "ponder" not in params:
+            budget = computer_player.TIME_LIMITS[DEFAULT_DIFFICULTY]
+
+        # Pondering searches without a deadline until ponderhit gives it the budget
+        self.pondering = params.get("ponder", False)
+        self.ponder_budget = budget if self.pondering else None
+        if self.pondering:
+            budget = None
+
+        self.release.clear()
+        hold = infinite or self.pondering
+        self.search_turn = self.board.turn
+        self.thread = threading.Thread(
+            target=self._search, args=(self.board.copy(), max_depth, budget, hold), daemon=True
+        )
+        computer_player.time_manager.arm(self.thread)
+        self.thread.start()
+
+    def stop(self):
+        """Abort the running search and wait until it has reported its move"""
+        self.pondering = False
+        self.release.set()
+        if self.thread is not None:
+            computer_player.time_manager.stop()
+            self.thread.join()
+        self.thread = None
+
+    def ponderhit(self):
+        """The opponent played the pondered move: continue as a normal timed search"""
+        if not self.pondering:
+            return
+        self.pondering = False
+        if self.ponder_budget is not None:
+            computer_player.time_manager.ponderhit(self.ponder_budget)
+        self.release.set()
+
+    def _search(self, board, max_depth, budget, hold):
+        move = None
+        if self.own_book and board.fullmove_number < 6:
+            move = computer_player.get_opening_move(board)
+        if move is None and self.threads > 1 and budget is not None:
+            # Lazy SMP; the workers keep to their budget even after "stop"
+            import smp
+            move, score, depth, nodes = smp.parallel_search(board, max_depth, budget, self.threads)
+            if move is not None:
+                self.send(f"info depth {depth} score {self.format_score(score)} nodes {nodes} pv {move.uci()}")
+        elif move is None:
+            computer_player.search_stats = SearchStats(callback=self._report)
+            try:
+                computer_player.prepare_search(board)
+                move, _, _ = computer_player.iterative_deepening(board, max_depth, budget)
+            finally:
+                computer_player.search_stats = None
+        if move is None:
+            legal_moves = computer_player.order_moves(board)
+            move = legal_moves[0] if legal_moves else None
+
+        # "go infinite" and an unanswered "go ponder" report only when stopped
+        if hold and not (self.ponder_budget is not None and not self.pondering):
+            self.release.wait()
+        if move is None:
+            self.send("bestmove 0000")
+            return
+        ponder_move = self.ponder_move(board, move)
+        self.send(f"bestmove {move.uci()}" + (f" ponder {ponder_move.uci()}" if ponder_move else ""))
+
+    def ponder_move(self, board, move):
+        """The opponent's expected reply to move, from the PV or the transposition table"""
+        line = computer_player.principal_variation
+        if computer_player.SEARCH_ALGORITHM == "pvs" and len(line) > 1 and line[0] == move:
+            return line[1]
+        board.push(move)
+        if board.is_game_over():
+            return None
+        return computer_player.expected_reply(board)
+
+    def format_score(self, score):
+        """UCI score from the side to move's point of view"""
+        if computer_player.SEARCH_ALGORITHM != "pvs":
+            # alphabeta scores are from White's point of view and carry no mate distance
+            if self.search_turn == chess.BLACK:
+                score = -score
+            return f"cp {int(score)}"
+        if abs(score) >= computer_player.MATE_THRESHOLD:
+            # Mates scored by the evaluator at a quiescence leaf carry no distance
+            moves = max(1, int(computer_player.MATE_SCORE - abs(score) + 1) // 2)
+            return f"mate {moves if score > 0 else -moves}"
+        return f"cp {int(score)}"
+
+    def _report(self, stats):
+        """info line after each completed iteration"""
+        iteration = stats.iterations[-1]
+        if iteration["score"] is None:
+            return
+        if computer_player.SEARCH_ALGORITHM == "pvs" and computer_player.principal_variation:
+            pv = " ".join(move.uci() for move in computer_player.principal_variation)
+        else:
+            pv = iteration["move"] or ""
+        elapsed = max(stats.elapsed, 1e-6)
+        self.send(f"info depth {iteration['depth']} score {self.format_score(iteration['score'])} "
+                  f"nodes {stats.nodes} nps {int(stats.nodes / elapsed)} time {int(elapsed * 1000)} pv {pv}")
+
+if __name__ == "__main__":
+    UCIEngine().run()
@@ -0,0 +1,76 @@
+import chess
+import chess.polyglot
+from board_encoding import piece_changes
+
+# -------------------------------
+# Polyglot Zobrist Keys
+# -------------------------------
+# Same random array and layout as chess.polyglot.zobrist_hash, so keys
+# maintained incrementally here are interchangeable with it.
+RANDOM_ARRAY = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+TURN_KEY = RANDOM_ARRAY[780]
+
+# PIECE_KEYS[color][piece_type][square]
+PIECE_KEYS = [
+    [None] + [
+        [RANDOM_ARRAY[64 * ((piece_type - 1) * 2 + color) + square] for square in chess.SQUARES]
+        for piece_type in chess.PIECE_TYPES
+    ]
+    for color in (0, 1)
+]
+
+_hasher = chess.polyglot.ZobristHasher(RANDOM_ARRAY)
+
+def zobrist_hash(board):
+    """Full 64-bit Polyglot key of a position"""
+    return chess.polyglot.zobrist_hash(board)
+
+def state_key(board):
+    """Castling and en passant part of the key"""
+    key = 0
+    if board.castling_rights:
+        key ^= _hasher.hash_castling(board)
+    if board.ep_square is not None:
+        key ^= _hasher.hash_ep_square(board)
+    return key
+
+def move_key(board, move):
+    """Piece part of the key change made by move, before it is pushed"""
+    removed, added = piece_changes(board, move)
+    key = 0
+    for color, piece_type, square in removed + added:
+        key ^= PIECE_KEYS[color][piece_type][square]
+    return key
+
+class ZobristTracker:
+    """Keeps the Zobrist key of one board up to date across push/pop"""
+
+    def __init__(self):
+        self.board = None
+        self.keys = []
+        self.base_ply = 0
+
+    def reset(self, board):
+        """Start tracking board from its current position"""
+        self.board = board
+        self.keys = [zobrist_hash(board)]
+        self.base_ply = len(board.move_stack)
+
+    def push(self, board, move):
+        if board is not self.board:
+            board.push(move)
+            return
+        key = self.keys[-1] ^ state_key(board) ^ move_key(board, move) ^ TURN_KEY
+        board.push(move)
+        self.keys.append(key ^ state_key(board))
+
+    def pop(self, board):
+        board.pop()
+        if board is self.board and len(self.keys) > 1:
+            self.keys.pop()
+
+    def key(self, board):
+        """Key of board, incremental when it is the tracked board"""
+        if board is self.board and len(board.move_stack) == self.base_ply + len(self.keys) - 1:
+            return self.keys[-1]
+        return zobrist_hash(board)